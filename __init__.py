@@ -18,18 +18,30 @@
 
 # <pep8 compliant>
 
-from os import path
-from pathlib import Path
+from os import cpu_count, path
 
 import bpy
 from bpy.app.handlers import persistent
-from bpy.props import (BoolProperty, EnumProperty, PointerProperty,
+from bpy.props import (BoolProperty, CollectionProperty, EnumProperty,
+                       FloatProperty, IntProperty, PointerProperty,
                        StringProperty)
 from bpy.types import AddonPreferences, Panel, PropertyGroup
 from bpy.utils import register_class, unregister_class
 
+from .cli import register_cli, unregister_cli
+from .export_preset import get_preset_items, validate_presets
+from .modules.export_queue import clear_export_queue, export_queue
+from .modules.folder_index import (ensure_folder_index, load_folder_index,
+                                   move_folder, recent_folders,
+                                   save_folder_index)
 from .modules.keymap_manager import *
+from .modules.layer_index import get_layer_collection, invalidate_layer_index
+from .modules.linked_data import join_linked_data_writers, join_writers
+from .modules.mesh_cache import (clear_mesh_cache, invalidate_mesh_cache,
+                                 mesh_cache, track_mesh_updates)
+from .modules.profiler import profiler
 from .operators import *
+from .ui_lists import *
 
 bl_info = {
     "name": "Export Toolset",
@@ -45,10 +57,33 @@ bl_info = {
 }
 
 
+def update_mesh_cache_size(self, context):
+    mesh_cache.set_budget(self.mesh_cache_size * 1024 * 1024)
+
+
 class ET_AddonPreferences(AddonPreferences):
     bl_idname = __name__
 
+    batch_workers: IntProperty(
+        name="Batch Workers",
+        description="Number of background Blender processes used by parallel batch export",
+        default=cpu_count() or 1, min=1)
+
+    mesh_cache_size: IntProperty(
+        name="Mesh Cache (MB)",
+        description="Memory used to keep evaluated meshes between Fast OBJ exports",
+        default=512, min=0, update=update_mesh_cache_size)
+
+    preset_directory: StringProperty(
+        name="User Presets",
+        description="Folder with additional presets in 'fbx' and 'obj' subfolders",
+        subtype='DIR_PATH')
+
     def draw(self, context):
+        self.layout.prop(self, "batch_workers")
+        self.layout.prop(self, "mesh_cache_size")
+        self.layout.prop(self, "preset_directory")
+
         keys = [('Window', 'export_toolset.single_export', None)]
         draw_key(self.layout, keys)
 
@@ -84,10 +119,15 @@ class ET_PT_panel(Panel):
         col = box.column(align=True)
         col.row(align=True).prop(export_properties, "format", expand=True)
 
+        row = col.row(align=True)
+
         if export_properties.format == "FBX":
-            col.prop(export_properties, "fbx_preset", text="")
+            row.prop(export_properties, "fbx_preset", text="")
         elif export_properties.format == "OBJ":
-            col.prop(export_properties, "obj_preset", text="")
+            row.prop(export_properties, "obj_preset", text="")
+
+        row.operator(ET_OT_reload_presets.bl_idname,
+                     text="", icon='FILE_REFRESH')
 
         if not selected_objects and export_mode == 'OBJECT':
             layout.separator()
@@ -100,6 +140,24 @@ class ET_PT_panel(Panel):
         col = box.column(align=True)
         col.prop(scene, "ET_reset_pos")
         col.prop(scene, "ET_reset_rot")
+        col.prop(scene, "ET_skip_unchanged")
+        col.prop(scene, "ET_dedup_instances")
+        col.prop(scene, "ET_use_queue")
+        col.prop(scene, "ET_profile")
+        col.prop(scene, "ET_compression")
+        col.prop(scene, "ET_export_backend")
+
+        if scene.ET_export_backend == 'FAST' and mesh_cache.hits:
+            col.label(text="Mesh Cache: %d hits, %.2f s saved" % (
+                mesh_cache.hits, mesh_cache.saved_seconds), icon='INFO')
+
+        if export_mode == 'COLLECTION':
+            col.prop(scene, "ET_merge_shards")
+
+        col.prop(scene, "ET_linked_data_format", text="")
+
+        if scene.ET_linked_data_format == 'JSON':
+            col.prop(scene, "ET_compact_json")
 
         # Active Export Directory
         box = layout.box()
@@ -114,6 +172,8 @@ class ET_PT_panel(Panel):
 
         col.prop(export_properties, "directory", text="")
 
+        ensure_folder_index(export_properties.directory)
+
         if len(recent_folders) > 0:
             try:
                 wm.ET_recent_folders = export_properties.directory
@@ -125,6 +185,33 @@ class ET_PT_panel(Panel):
             row.operator(ET_OT_sync_dir_path.bl_idname,
                          text="", icon='FILE_REFRESH')
 
+        # Additional Export Targets
+        box = layout.box()
+        box.label(text="Additional Targets:")
+        row = box.row()
+        row.template_list("ET_UL_export_targets", "", export_properties,
+                          "targets", export_properties, "target_index",
+                          rows=2)
+        col = row.column(align=True)
+        col.operator(ET_OT_add_export_target.bl_idname, text="", icon='ADD')
+        col.operator(ET_OT_remove_export_target.bl_idname,
+                     text="", icon='REMOVE')
+
+        targets = export_properties.targets
+        target_index = export_properties.target_index
+
+        if 0 <= target_index < len(targets):
+            target = targets[target_index]
+            col = box.column(align=True)
+            col.row(align=True).prop(target, "format", expand=True)
+
+            if target.format == "FBX":
+                col.prop(target, "fbx_preset", text="")
+            elif target.format == "OBJ":
+                col.prop(target, "obj_preset", text="")
+
+            col.prop(target, "directory", text="")
+
         # Export Buttons
         col = layout.column()
         col.scale_y = 1.4
@@ -132,10 +219,15 @@ class ET_PT_panel(Panel):
         if export_mode == 'OBJECT':
             col.operator(ET_OT_export_single.bl_idname, icon='EXPORT')
             col.operator(ET_OT_export_batch.bl_idname, icon='EXPORT')
+            col.operator(ET_OT_export_batch_parallel.bl_idname, icon='EXPORT')
             col.operator(
                 ET_OT_export_linked_data.bl_idname, icon='EXPORT')
         elif export_mode == 'COLLECTION':
             col.operator(ET_OT_export_single.bl_idname, icon='EXPORT')
+            col.operator(ET_OT_export_child_collections.bl_idname,
+                         icon='EXPORT')
+            col.operator(ET_OT_export_collection_sharded.bl_idname,
+                         icon='EXPORT')
 
             # Show Active Collection
             box = layout.box()
@@ -147,23 +239,64 @@ class ET_PT_panel(Panel):
             box.prop(active_collection, "name",
                      text="", icon='GROUP')
 
-        # Show Selected Objects
-        if (export_mode == 'OBJECT' and active_object):
-            box = layout.box()
-            box.label(text="Objects to Export:")
-            col = box.column(align=True)
+            layer_collection = get_layer_collection(
+                context.view_layer, active_collection)
 
-            for obj in selected_objects:
-                row = col.row(align=True)
-                type_icon = 'OUTLINER_OB_' + obj.type
+            if layer_collection and layer_collection.exclude:
+                box.label(text="Excluded from View Layer", icon='INFO')
 
-                if not obj.export_properties.directory:
-                    row.alert = True
+        # Build Manifest
+        row = layout.row(align=True)
+        row.operator(ET_OT_export_outdated.bl_idname, icon='FILE_REFRESH')
+        row.operator(ET_OT_report_orphaned_outputs.bl_idname,
+                     text="", icon='ORPHAN_DATA')
 
-                row.prop(obj, "name", text="", icon=type_icon)
+        # Export Queue
+        if export_queue.running:
+            box = layout.box()
+            box.label(text="Export Queue: %d / %d" %
+                      (export_queue.done, export_queue.total))
+            row = box.row(align=True)
+            row.prop(wm, "ET_queue_progress", text="", slider=True)
+            row.operator(ET_OT_pause_export_queue.bl_idname, text="",
+                         icon='PLAY' if export_queue.paused else 'PAUSE')
+            row.operator(ET_OT_cancel_export_queue.bl_idname, text="",
+                         icon='CANCEL')
+
+        # Profile Summary
+        if scene.ET_profile and profiler.events:
+            box = layout.box()
+            row = box.row()
+            row.label(text="Profile:")
+            row.operator(ET_OT_save_profile.bl_idname, text="",
+                         icon='FILE_TICK')
+            row.operator(ET_OT_clear_profile.bl_idname, text="",
+                         icon='TRASH')
+
+            col = box.column(align=True)
+            row = col.row()
+            row.label(text="Stage")
+            row.label(text="Calls")
+            row.label(text="Wall ms")
+            row.label(text="CPU ms")
+
+            for name, count, wall, cpu in profiler.summary():
+                row = col.row()
+                row.label(text=name)
+                row.label(text=str(count))
+                row.label(text="%.1f" % (wall * 1e3))
+                row.label(text="%.1f" % (cpu * 1e3))
 
-                if obj.name == active_object.name:
-                    row.label(icon='LAYER_ACTIVE')
+        # Show Selected Objects
+        if (export_mode == 'OBJECT' and active_object):
+            box = layout.box()
+            box.label(text="Objects to Export:")
+            draw_export_summary(box, get_export_summary(
+                ("selected", context.view_layer.as_pointer()),
+                selected_objects))
+            box.template_list("ET_UL_objects", "selected",
+                              context.view_layer, "objects",
+                              wm, "ET_object_index", rows=8)
         elif export_mode == 'COLLECTION':
 
             if len(active_collection.children) > 0:
@@ -177,12 +310,25 @@ class ET_PT_panel(Panel):
             else:
                 box = layout.box()
                 box.label(text="Objects to Export:")
-                col = box.column(align=True)
+                draw_export_summary(box, get_export_summary(
+                    ("collection", active_collection.as_pointer()),
+                    active_collection.objects))
+                box.template_list("ET_UL_objects", "collection",
+                                  active_collection, "objects",
+                                  wm, "ET_object_index", rows=8)
 
-                for obj in active_collection.objects:
-                    row = col.row(align=True)
-                    type_icon = 'OUTLINER_OB_' + obj.type
-                    row.prop(obj, "name", text="", icon=type_icon)
+
+def update_profiler(self, context):
+    profiler.enabled = self.ET_profile
+
+
+@persistent
+def sync_profiler(dummy):
+    profiler.enabled = bpy.context.scene.ET_profile
+
+
+def get_queue_progress(self):
+    return export_queue.progress() * 100.0
 
 
 def get_recent_folders(self, context):
@@ -206,35 +352,26 @@ def update_recent_folder(self, context):
         export_properties.directory = new_dir_path
 
 
-recent_folders = []
-
-
-@persistent
-def collect_recent_folders(dummy):
-    recent_folders.clear()
-    objects = bpy.context.view_layer.objects
-    collections = bpy.data.collections
-
-    folders = []
-
-    for obj in objects:
-        dir_path = obj.export_properties.directory
-
-        if dir_path:
-            folders.append(dir_path)
-
-    for collection in collections:
-        dir_path = collection.export_properties.directory
+class ExportTarget(PropertyGroup):
+    def get_directory(self):
+        return self.get("directory", "")
 
-        if dir_path:
-            folders.append(dir_path)
+    def set_directory(self, value):
+        self["directory"] = path.abspath(bpy.path.abspath(value)) \
+            if value else ""
 
-    folders = list(set(folders))
+    def get_export_presets(self, context):
+        return get_preset_items(self.format.lower())
 
-    for dir_path in folders:
-        dir_name = path.basename(path.normpath(dir_path))
-        recent_folder = (dir_path, dir_name, '')
-        recent_folders.append(recent_folder)
+    enabled: BoolProperty(name="Enabled", default=True)
+    format: EnumProperty(name="Export Format",
+                         items=[("FBX", "FBX", "", 1), ("OBJ", "OBJ", "", 2)])
+    fbx_preset: EnumProperty(name="FBX Export Preset",
+                             items=get_export_presets)
+    obj_preset: EnumProperty(name="OBJ Export Preset",
+                             items=get_export_presets)
+    directory: StringProperty(name="Export Path", default="", subtype='DIR_PATH',
+                              get=get_directory, set=set_directory)
 
 
 class ExportProperties(PropertyGroup):
@@ -242,12 +379,6 @@ class ExportProperties(PropertyGroup):
         dir_path = self["directory"]
 
         if dir_path:
-            dir_name = path.basename(path.normpath(dir_path))
-            recent_folder = (dir_path, dir_name, '')
-
-            if recent_folder not in recent_folders:
-                recent_folders.append(recent_folder)
-
             wm = context.window_manager
 
             if wm.ET_recent_folders != dir_path:
@@ -260,31 +391,12 @@ class ExportProperties(PropertyGroup):
             return ""
 
     def set_directory(self, value):
-        self["directory"] = path.abspath(bpy.path.abspath(value))
+        dir_path = path.abspath(bpy.path.abspath(value))
+        move_folder(self.get("directory", ""), dir_path)
+        self["directory"] = dir_path
 
     def get_export_presets(self, context):
-        active_object = context.active_object
-        selected_objects = context.selected_objects
-        active_collection = context.collection
-
-        if len(selected_objects) == 0:
-            export_properties = active_collection.export_properties
-        elif active_collection:
-            export_properties = active_object.export_properties
-
-        export_format = export_properties.format.lower()
-        export_presets = []
-
-        dir = Path(__file__).parent.absolute()
-        preset_path = dir / "presets" / export_format
-        paths = list(Path(preset_path).rglob('*.py'))
-
-        for path in paths:
-            p = Path(path)
-            name = p.stem
-            export_presets.append((name, name, ""))
-
-        return export_presets
+        return get_preset_items(self.format.lower())
 
     export_formats = [
         ("FBX", "FBX", "", 1),
@@ -298,20 +410,41 @@ class ExportProperties(PropertyGroup):
                              items=get_export_presets)
     directory: StringProperty(name="Export Path", default="", subtype='DIR_PATH',
                               update=update_directory, get=get_directory, set=set_directory)
+    targets: CollectionProperty(type=ExportTarget)
+    target_index: IntProperty(default=0)
 
 
 classes = (
     ET_AddonPreferences,
     ET_PT_panel,
+    ET_UL_objects,
+    ET_UL_export_targets,
     ET_OT_export_single,
     ET_OT_export_batch,
+    ET_OT_export_batch_parallel,
+    ET_OT_export_child_collections,
+    ET_OT_export_outdated,
+    ET_OT_report_orphaned_outputs,
+    ET_OT_export_collection_sharded,
+    ET_OT_process_export_queue,
+    ET_OT_pause_export_queue,
+    ET_OT_cancel_export_queue,
+    ET_OT_add_export_target,
+    ET_OT_remove_export_target,
     ET_OT_sync_dir_path,
+    ET_OT_reload_presets,
+    ET_OT_save_profile,
+    ET_OT_clear_profile,
     ET_OT_export_linked_data,
+    ExportTarget,
     ExportProperties,
 )
 
 
 def register():
+    # Fail early on broken presets instead of in the middle of an export
+    validate_presets()
+
     for cls in classes:
         register_class(cls)
 
@@ -324,22 +457,125 @@ def register():
         items=get_recent_folders,
         update=update_recent_folder)
 
+    bpy.types.WindowManager.ET_queue_progress = FloatProperty(
+        name="Export Queue Progress", subtype='PERCENTAGE',
+        min=0.0, max=100.0, get=get_queue_progress)
+
+    bpy.types.WindowManager.ET_object_index = IntProperty(
+        name="Active Object Index", default=0)
+
     bpy.types.Scene.ET_reset_pos = BoolProperty(
         name="Reset Position", description="Set object position to (0, 0, 0)", default=False)
 
     bpy.types.Scene.ET_reset_rot = BoolProperty(
         name="Reset Rotation", description="Set object rotation to (0, 0, 0)", default=False)
 
-    bpy.app.handlers.load_post.append(collect_recent_folders)
+    bpy.types.Scene.ET_linked_data_format = EnumProperty(
+        name="Linked Data Format",
+        description="File format written by Export Linked Data",
+        items=[
+            ("JSON", "JSON", "Indented or compact JSON document"),
+            ("NDJSON", "NDJSON", "One JSON record per line"),
+            ("BINARY", "Binary", "Little-endian float32 arrays and a name table"),
+            ("NPZ", "NPZ", "NumPy archive with one array per transform"),
+        ])
+
+    bpy.types.Scene.ET_compression = EnumProperty(
+        name="Compression",
+        description="Compress OBJ and MTL files after export",
+        items=[
+            ("NONE", "None", "Write files uncompressed"),
+            ("GZIP", "Gzip", "Write .gz files readable everywhere"),
+            ("ZSTD", "Zstandard", "Write .zst files, needs the zstandard module, falls back to gzip"),
+        ])
+
+    bpy.types.Scene.ET_export_backend = EnumProperty(
+        name="Exporter",
+        description="How the FBX and OBJ exporters are called",
+        items=[
+            ("OPERATOR", "Operator", "Call the export operators, slower but works with any settings"),
+            ("DIRECT", "Direct", "Call the exporter modules with the object list, falls back to the operator"),
+            ("FAST", "Fast OBJ", "Write OBJ files with the built-in NumPy writer, other formats use Direct"),
+        ],
+        default="OPERATOR")
+
+    bpy.types.Scene.ET_dedup_instances = BoolProperty(
+        name="Export Instances Once", description="Export Batch writes objects sharing mesh data once, plus a placement table", default=False)
+
+    bpy.types.Scene.ET_merge_shards = BoolProperty(
+        name="Merge Shards", description="Merge OBJ files written by sharded collection export into one file", default=False)
+
+    bpy.types.Scene.ET_use_queue = BoolProperty(
+        name="Queue Exports", description="Run exports in the background one by one, smallest first", default=False)
+
+    bpy.types.Scene.ET_profile = BoolProperty(
+        name="Profile Exports", description="Record wall and CPU time of each export stage", default=False,
+        update=update_profiler)
+
+    bpy.types.Scene.ET_compact_json = BoolProperty(
+        name="Compact JSON", description="Write linked data without indentation", default=False)
+
+    bpy.types.Scene.ET_skip_unchanged = BoolProperty(
+        name="Skip Unchanged", description="Skip objects whose data and preset did not change since the last export", default=False)
+
+    bpy.app.handlers.load_post.append(load_folder_index)
+    bpy.app.handlers.save_pre.append(save_folder_index)
+    bpy.app.handlers.save_pre.append(join_linked_data_writers)
+    bpy.app.handlers.load_post.append(invalidate_layer_index)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_layer_index)
+    bpy.app.handlers.undo_post.append(invalidate_layer_index)
+    bpy.app.handlers.redo_post.append(invalidate_layer_index)
+    bpy.app.handlers.load_post.append(invalidate_list_cache)
+    bpy.app.handlers.load_post.append(clear_export_queue)
+    bpy.app.handlers.load_post.append(sync_profiler)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_list_cache)
+    bpy.app.handlers.undo_post.append(invalidate_list_cache)
+    bpy.app.handlers.redo_post.append(invalidate_list_cache)
+    bpy.app.handlers.load_post.append(clear_mesh_cache)
+    bpy.app.handlers.undo_post.append(clear_mesh_cache)
+    bpy.app.handlers.redo_post.append(clear_mesh_cache)
+    bpy.app.handlers.depsgraph_update_post.append(track_mesh_updates)
+    bpy.app.handlers.frame_change_post.append(invalidate_mesh_cache)
+
+    try:
+        prefs = bpy.context.preferences.addons[__name__].preferences
+        update_mesh_cache_size(prefs, bpy.context)
+    except KeyError:
+        pass
+
     register_keymap()
+    register_cli()
 
 
 def unregister():
     for cls in classes:
         unregister_class(cls)
 
-    bpy.app.handlers.load_post.remove(collect_recent_folders)
+    bpy.app.handlers.load_post.remove(load_folder_index)
+    bpy.app.handlers.save_pre.remove(save_folder_index)
+    bpy.app.handlers.save_pre.remove(join_linked_data_writers)
+    bpy.app.handlers.load_post.remove(invalidate_layer_index)
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_layer_index)
+    bpy.app.handlers.undo_post.remove(invalidate_layer_index)
+    bpy.app.handlers.redo_post.remove(invalidate_layer_index)
+    bpy.app.handlers.load_post.remove(invalidate_list_cache)
+    bpy.app.handlers.load_post.remove(clear_export_queue)
+    bpy.app.handlers.load_post.remove(sync_profiler)
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_list_cache)
+    bpy.app.handlers.undo_post.remove(invalidate_list_cache)
+    bpy.app.handlers.redo_post.remove(invalidate_list_cache)
+    bpy.app.handlers.load_post.remove(clear_mesh_cache)
+    bpy.app.handlers.undo_post.remove(clear_mesh_cache)
+    bpy.app.handlers.redo_post.remove(clear_mesh_cache)
+    bpy.app.handlers.depsgraph_update_post.remove(track_mesh_updates)
+    bpy.app.handlers.frame_change_post.remove(invalidate_mesh_cache)
+
+    # Don't leave half written linked data files behind
+    for file_path, error in join_writers():
+        print("Export Toolset: failed to write %s: %s" % (file_path, error))
+
     unregister_keymap()
+    unregister_cli()
 
 
 if __name__ == "__main__":
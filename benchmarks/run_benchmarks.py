@@ -0,0 +1,267 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# Export pipeline benchmarks, run inside Blender:
+#
+#   blender -b --factory-startup --python benchmarks/run_benchmarks.py -- \
+#       --output results.json [--baseline baseline.json] [--threshold 0.1]
+#
+# Synthetic scenes are generated for every combination of --counts,
+# --density, --depth and --linked. Exit code is 1 when a case is slower
+# than the baseline by more than the threshold.
+
+import argparse
+import importlib
+import itertools
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from os import path
+
+import bmesh
+import bpy
+
+addon_dir = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    def numbers(cast):
+        return lambda text: [cast(value) for value in text.split(",")]
+
+    parser = argparse.ArgumentParser(prog="run_benchmarks.py")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Allowed slowdown against the baseline, 0.1 = 10%%")
+    parser.add_argument("--counts", type=numbers(int), default=[10, 100, 1000],
+                        help="Object counts, up to 50000")
+    parser.add_argument("--density", type=numbers(int), default=[4],
+                        help="Grid subdivisions per mesh")
+    parser.add_argument("--depth", type=numbers(int), default=[2],
+                        help="Collection nesting depth")
+    parser.add_argument("--linked", type=numbers(float), default=[0.5],
+                        help="Ratio of objects sharing mesh data")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-exports", type=int, default=50,
+                        help="Objects exported by the batch case")
+
+    return parser.parse_args(argv)
+
+
+def load_addon():
+    parent, name = path.split(addon_dir)
+
+    if parent not in sys.path:
+        sys.path.append(parent)
+
+    addon = importlib.import_module(name)
+    addon.register()
+
+    return name
+
+
+def clear_scene():
+    for datablocks in (bpy.data.objects, bpy.data.meshes,
+                       bpy.data.collections):
+        for datablock in list(datablocks):
+            datablocks.remove(datablock)
+
+
+def generate_scene(object_count, density, depth, linked, directory):
+    """Return the root collection of a new synthetic scene"""
+    clear_scene()
+    scene = bpy.context.scene
+
+    root = bpy.data.collections.new("Benchmark")
+    scene.collection.children.link(root)
+    collections = [root]
+
+    for level in range(depth):
+        collection = bpy.data.collections.new("Level %d" % (level + 1))
+        collections[-1].children.link(collection)
+        collections.append(collection)
+
+    unique_count = max(1, round(object_count * (1.0 - linked)))
+    meshes = []
+
+    for i in range(unique_count):
+        mesh = bpy.data.meshes.new("Mesh.%05d" % i)
+        bm = bmesh.new()
+        bmesh.ops.create_grid(bm, x_segments=density, y_segments=density,
+                              size=1.0)
+        bm.to_mesh(mesh)
+        bm.free()
+        meshes.append(mesh)
+
+    for i in range(object_count):
+        ob = bpy.data.objects.new("Object.%05d" % i, meshes[i % unique_count])
+        ob.location = (i % 100 * 3.0, i // 100 * 3.0, 0.0)
+        collections[i % len(collections)].objects.link(ob)
+
+        ob.export_properties.format = 'FBX'
+        ob.export_properties.directory = directory
+
+    root.export_properties.format = 'FBX'
+    root.export_properties.directory = directory
+
+    bpy.context.view_layer.update()
+
+    return root
+
+
+def select(objects, active=None):
+    view_layer = bpy.context.view_layer
+
+    for ob in view_layer.objects:
+        ob.select_set(False)
+
+    for ob in objects:
+        ob.select_set(True)
+
+    view_layer.objects.active = active
+
+
+def measure(func, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def run_cases(addon_name, root, args, directory):
+    export_preset = importlib.import_module(addon_name + ".export_preset")
+    folder_index = importlib.import_module(addon_name + ".modules.folder_index")
+    linked_data = importlib.import_module(addon_name + ".modules.linked_data")
+
+    objects = list(bpy.context.view_layer.objects)
+    view_layer = bpy.context.view_layer
+    results = {}
+
+    def export_scene():
+        select(objects[:10], objects[0])
+        export_preset.export_scene(directory, "export_scene", "Default", "fbx")
+
+        # Finalizing runs on the writer thread and is part of the export
+        errors = export_preset.write_pipeline.wait_for_writes()
+
+        if errors:
+            raise RuntimeError(errors[0])
+
+    def export_batch():
+        select(objects[:args.max_exports], objects[0])
+        bpy.ops.export_toolset.export_batch()
+
+    def export_collection():
+        select([])
+        view_layer.active_layer_collection = \
+            view_layer.layer_collection.children[root.name]
+        bpy.ops.export_toolset.single_export()
+
+    def export_linked_data():
+        select([objects[0]], objects[0])
+        bpy.ops.export_toolset.export_linked_data()
+
+        for writer in linked_data.active_writers:
+            writer.join()
+
+    def recent_folders():
+        folder_index.collect_recent_folders()
+
+    def enum_callbacks():
+        for ob in objects[:1000]:
+            ob.export_properties.fbx_preset
+
+    results["export_scene"] = measure(export_scene, args.repeat)
+    results["export_batch"] = measure(export_batch, args.repeat)
+    results["export_single_collection"] = measure(export_collection,
+                                                  args.repeat)
+    results["export_linked_data"] = measure(export_linked_data, args.repeat)
+    results["collect_recent_folders"] = measure(recent_folders, args.repeat)
+    results["preset_enum_callbacks"] = measure(enum_callbacks, args.repeat)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+
+    for case, timing in sorted(results.items()):
+        base = baseline.get(case)
+
+        if base is None:
+            print("%-60s %10.4fs   (new)" % (case, timing["median"]))
+            continue
+
+        ratio = timing["median"] / base["median"] if base["median"] else 1.0
+        status = "REGRESSION" if ratio > 1.0 + threshold else "ok"
+        print("%-60s %10.4fs %7.2fx  %s" %
+              (case, timing["median"], ratio, status))
+
+        if status != "ok":
+            regressions.append(case)
+
+    return regressions
+
+
+def main():
+    args = parse_args()
+    addon_name = load_addon()
+    results = {}
+
+    for count, density, depth, linked in itertools.product(
+            args.counts, args.density, args.depth, args.linked):
+        directory = tempfile.mkdtemp(prefix="export_toolset_bench_")
+        key = "n%d_d%d_depth%d_linked%.2f" % (count, density, depth, linked)
+
+        try:
+            root = generate_scene(count, density, depth, linked, directory)
+
+            for case, timing in run_cases(addon_name, root, args,
+                                          directory).items():
+                results[case + "/" + key] = timing
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    with open(args.output, 'w') as file:
+        json.dump({"blender": bpy.app.version_string, "cases": results},
+                  file, indent=4, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)["cases"]
+
+        regressions = compare(results, baseline, args.threshold)
+
+        if regressions:
+            print("%d cases regressed more than %d%%" %
+                  (len(regressions), args.threshold * 100))
+            sys.exit(1)
+
+
+main()
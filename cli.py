@@ -0,0 +1,264 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# Headless batch export for build machines:
+#
+#   blender -b scene.blend -- --export-toolset [--filter GLOB]
+#       [--collection NAME] [--type {all,objects,collections}] [--dry-run]
+#
+# Every object and collection with an export folder set is exported with
+# its stored export properties. One JSON line is printed per file and the
+# process exits with 0 on success, 1 if any export failed and 2 if the
+# arguments are invalid or nothing matched.
+
+import argparse
+import fnmatch
+import json
+import sys
+import time
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .export_preset import get_export_path, get_export_targets
+from .modules.build_manifest import load_build_manifest, save_build_manifest
+from .modules.fingerprint import save_manifest
+from .modules.scene_state import SceneState, get_collection_objects
+from .modules.target_export import export_targets, get_pending_targets
+from .modules.transforms import TransformReset
+from .modules.write_pipeline import wait_for_writes
+
+CLI_FLAG = "--export-toolset"
+
+
+class ArgumentError(Exception):
+    pass
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise ArgumentError(message)
+
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+
+    parser = ArgumentParser(prog="blender -b file.blend --")
+    parser.add_argument(CLI_FLAG, action='store_true', required=True)
+    parser.add_argument("--filter", default="*",
+                        help="Export only objects and collections whose "
+                        "name matches this glob")
+    parser.add_argument("--collection", default=None,
+                        help="Export only targets inside this collection")
+    parser.add_argument("--type", default="all",
+                        choices=("all", "objects", "collections"))
+    parser.add_argument("--dry-run", action='store_true',
+                        help="List targets without exporting")
+
+    return parser.parse_args(argv)
+
+
+def collect_targets(args):
+    targets = []
+
+    if args.collection is not None:
+        root = bpy.data.collections.get(args.collection)
+
+        if root is None:
+            raise ArgumentError("Collection '%s' not found" % args.collection)
+
+        objects = get_collection_objects(root)
+        collections = [root] + collect_children(root)
+    else:
+        objects = bpy.context.view_layer.objects
+        collections = bpy.data.collections
+
+    if args.type in ("all", "objects"):
+        for ob in sorted(objects, key=lambda ob: ob.name):
+            if (ob.export_properties.directory and
+                    fnmatch.fnmatchcase(ob.name, args.filter)):
+                targets.append(('OBJECT', ob))
+
+    if args.type in ("all", "collections"):
+        for col in sorted(collections, key=lambda col: col.name):
+            if (col.export_properties.directory and
+                    fnmatch.fnmatchcase(col.name, args.filter)):
+                targets.append(('COLLECTION', col))
+
+    return targets
+
+
+def collect_children(collection):
+    children = []
+
+    for col in collection.children:
+        children.append(col)
+        children.extend(collect_children(col))
+
+    return children
+
+
+def print_record(record):
+    sys.stdout.write(json.dumps(record, sort_keys=True) + "\n")
+    sys.stdout.flush()
+
+
+def export_target(context, state, manifests, build_manifest, kind,
+                  datablock):
+    """Export every export target of a datablock, return one record each"""
+    scene = context.scene
+    name = datablock.name
+    outputs = get_export_targets(datablock.export_properties)
+    records = {}
+
+    for _, directory, export_format, _ in outputs:
+        records[directory, export_format] = {
+            "type": kind.lower(),
+            "name": name,
+            "file": get_export_path(directory, name,
+                                    export_format).as_posix(),
+            "status": "skipped",
+            "seconds": 0.0}
+
+    reset = None
+
+    # A datablock that can't be selected fails alone, not the whole run
+    try:
+        if kind == 'OBJECT':
+            objects = [datablock]
+            state.select(objects, active=datablock)
+        else:
+            objects = state.prepare_collection(datablock)
+            state.select(objects)
+
+        pending = get_pending_targets(
+            objects, outputs, name,
+            manifests if scene.ET_skip_unchanged is True else None,
+            use_fingerprints=build_manifest is not None)
+
+        if kind == 'OBJECT' and (scene.ET_reset_pos or scene.ET_reset_rot):
+            reset = TransformReset(context.view_layer.objects.selected)
+            reset.apply(scene.ET_reset_pos, scene.ET_reset_rot,
+                        scene.tool_settings.transform_pivot_point)
+            context.view_layer.update()
+
+        results = []
+
+        # Timed one file at a time, selection and reset are shared
+        for target, fingerprint in pending:
+            _, directory, export_format, _ = target
+            target_start = time.perf_counter()
+            results.extend(export_targets(
+                name, [(target, fingerprint)],
+                manifests if scene.ET_skip_unchanged is True else None,
+                build_manifest, kind))
+            records[directory, export_format]["seconds"] = round(
+                time.perf_counter() - target_start, 4)
+    except Exception as e:
+        for record in records.values():
+            record.update(status="error", error=str(e))
+
+        results = []
+    finally:
+        if reset is not None:
+            reset.restore()
+
+    for (_, directory, export_format, _), error in results:
+        record = records[directory, export_format]
+
+        if error is None:
+            record.update(status="ok")
+        else:
+            record.update(status="error", error=error)
+
+    return list(records.values())
+
+
+def main(argv=None):
+    try:
+        args = parse_args(sys.argv if argv is None else argv)
+        targets = collect_targets(args)
+    except ArgumentError as e:
+        print_record({"status": "error", "error": str(e)})
+        return 2
+
+    if not targets:
+        print_record({"status": "error", "error": "Nothing to export"})
+        return 2
+
+    if args.dry_run:
+        for kind, datablock in targets:
+            print_record({"type": kind.lower(), "name": datablock.name,
+                          "status": "planned"})
+
+        return 0
+
+    context = bpy.context
+    state = SceneState(context.view_layer)
+    manifests = {}
+    build_manifest = load_build_manifest()
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    start = time.perf_counter()
+
+    for kind, datablock in targets:
+        records = export_target(context, state, manifests, build_manifest,
+                                kind, datablock)
+
+        for record in records:
+            counts[record["status"]] += 1
+            print_record(record)
+
+    state.restore()
+
+    # Exports are moved into place on a writer thread, don't exit before
+    for error in wait_for_writes():
+        counts["error"] += 1
+        print_record({"status": "error", "error": error})
+
+    for directory, manifest in manifests.items():
+        save_manifest(directory, manifest)
+
+    save_build_manifest(build_manifest)
+
+    print_record({"summary": dict(
+        counts, seconds=round(time.perf_counter() - start, 4))})
+
+    return 1 if counts["error"] else 0
+
+
+def run():
+    sys.exit(main())
+
+
+@persistent
+def run_on_load(dummy):
+    bpy.app.handlers.load_post.remove(run_on_load)
+    run()
+
+
+def register_cli():
+    # Run once the .blend given on the command line has been loaded
+    if bpy.app.background and CLI_FLAG in sys.argv:
+        bpy.app.handlers.load_post.append(run_on_load)
+
+
+def unregister_cli():
+    if run_on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(run_on_load)
@@ -19,38 +19,360 @@
 # <pep8 compliant>
 
 
+import ast
+import hashlib
+from collections import namedtuple
 from os import path
 from pathlib import Path
+from types import MappingProxyType
 
 import bpy
 
+from .modules import write_pipeline
+from .modules.export_backends import export_objects
+from .modules.profiler import profiler
 
-def export_scene(directory, file_name, export_preset, export_format):
-    filepath = Path(directory) / (file_name + "." + export_format)
+# Single preset assignment: op.<name> = <value>
+PresetField = namedtuple('PresetField', ('name', 'value', 'type', 'lineno'))
+
+literal_types = (str, int, float, bool, set, frozenset, tuple)
+
+# Parsed presets keyed on (format, preset name, file mtime)
+preset_cache = {}
+preset_cache_stats = {"hits": 0, "misses": 0}
+preset_hashes = {}
+
+export_formats = ("fbx", "obj")
+
+# Enum items per format. Blender requires the item tuples returned by
+# EnumProperty callbacks to stay referenced from Python.
+preset_items = {}
+preset_paths = {}
+preset_dir_mtimes = {}
+
+
+class PresetError(Exception):
+    pass
+
+
+def get_preset_dirs(export_format):
+    dirs = [Path(__file__).parent.absolute() / "presets" / export_format]
+
+    # Presets saved from the exporter's own preset menu
+    operator_presets = bpy.utils.user_resource(
+        'SCRIPTS', path=path.join("presets", "operator",
+                                  "export_scene." + export_format))
+
+    if operator_presets:
+        dirs.append(Path(operator_presets))
+
+    try:
+        prefs = bpy.context.preferences.addons[__package__].preferences
+        user_dir = prefs.preset_directory
+    except (AttributeError, KeyError):
+        user_dir = ""
+
+    if user_dir:
+        dirs.append(Path(bpy.path.abspath(user_dir)) / export_format)
+
+    return dirs
+
+
+def get_dir_mtime(dir):
+    try:
+        return path.getmtime(dir)
+    except OSError:
+        return None
+
+
+def scan_presets(export_format, dirs):
+    paths = {}
+
+    # Later directories override presets with the same name
+    for dir in dirs:
+        if dir.is_dir():
+            for preset_path in sorted(dir.glob('*.py')):
+                paths[preset_path.stem] = preset_path
+
+    preset_paths[export_format] = paths
+    preset_items[export_format] = [
+        (name, name, str(preset_path))
+        for name, preset_path in sorted(paths.items())]
+
+
+def get_preset_items(export_format):
+    dirs = get_preset_dirs(export_format)
+    mtimes = tuple((dir, get_dir_mtime(dir)) for dir in dirs)
+
+    if preset_dir_mtimes.get(export_format) != mtimes:
+        scan_presets(export_format, dirs)
+        preset_dir_mtimes[export_format] = mtimes
+
+    return preset_items[export_format]
+
+
+def reload_presets():
+    preset_dir_mtimes.clear()
+    clear_preset_cache()
+
+    for export_format in export_formats:
+        get_preset_items(export_format)
+
+
+def get_preset_path(export_format, export_preset):
+    if export_format not in preset_paths:
+        get_preset_items(export_format)
+
+    preset_path = preset_paths[export_format].get(export_preset)
+
+    if preset_path is None:
+        raise PresetError("Export preset '%s' for %s not found"
+                          % (export_preset, export_format.upper()))
+
+    return preset_path
+
+
+def is_preset_header(node):
+    # "import bpy" and "op = bpy.context.active_operator"
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names] == ['bpy']
+
+    return (isinstance(node, ast.Assign) and
+            len(node.targets) == 1 and
+            isinstance(node.targets[0], ast.Name) and
+            node.targets[0].id == 'op')
+
+
+def parse_preset(preset_path):
+    with open(preset_path, 'r') as file:
+        source = file.read()
+
+    try:
+        tree = ast.parse(source, filename=str(preset_path))
+    except SyntaxError as e:
+        raise PresetError("%s:%s: %s" % (preset_path, e.lineno, e.msg))
+    except (ValueError, MemoryError, RecursionError) as e:
+        # Null bytes or nesting too deep for the parser
+        raise PresetError("%s: %s" % (preset_path, str(e) or type(e).__name__))
+
+    fields = []
+
+    for node in tree.body:
+        if is_preset_header(node):
+            continue
+
+        target = node.targets[0] if (isinstance(node, ast.Assign) and
+                                     len(node.targets) == 1) else None
+
+        if not (isinstance(target, ast.Attribute) and
+                isinstance(target.value, ast.Name) and
+                target.value.id == 'op'):
+            raise PresetError("%s:%d: expected 'op.<attribute> = <literal>'"
+                              % (preset_path, node.lineno))
+
+        try:
+            value = ast.literal_eval(node.value)
+        except (ValueError, TypeError, MemoryError, RecursionError):
+            # Unsupported or malformed nodes, and huge or deeply nested values
+            raise PresetError("%s:%d: value of '%s' is not a literal"
+                              % (preset_path, node.lineno, target.attr))
+
+        if not isinstance(value, literal_types):
+            raise PresetError("%s:%d: unsupported value type '%s' for '%s'"
+                              % (preset_path, node.lineno,
+                                 type(value).__name__, target.attr))
+
+        fields.append(PresetField(target.attr, value, type(value),
+                                  node.lineno))
+
+    return fields
+
+
+def get_operator_properties(export_format):
+    try:
+        op = getattr(bpy.ops.export_scene, export_format)
+        rna = op.get_rna_type()
+    except (AttributeError, KeyError, RuntimeError):
+        return None
+
+    return {prop.identifier for prop in rna.properties
+            if prop.identifier != 'rna_type'}
+
+
+def get_preset_errors():
+    """Return [(preset path, error message)] of every listed preset"""
+    errors = []
+
+    for export_format in export_formats:
+        properties = get_operator_properties(export_format)
+        get_preset_items(export_format)
+
+        for preset_path in preset_paths[export_format].values():
+            try:
+                fields = parse_preset(preset_path)
+            except PresetError as e:
+                errors.append((preset_path, str(e)))
+                continue
+
+            # Exporter add-on is disabled, skip attributes check
+            if properties is None:
+                continue
+
+            for field in fields:
+                if field.name not in properties:
+                    errors.append((preset_path,
+                                   "%s:%d: '%s' is not a property of "
+                                   "export_scene.%s"
+                                   % (preset_path, field.lineno, field.name,
+                                      export_format)))
+
+    return errors
+
+
+def find_preset_errors():
+    return [message for _, message in get_preset_errors()]
+
+
+def validate_presets():
+    """Raise for broken bundled presets, only warn about user presets"""
+    bundled_dir = Path(__file__).parent.absolute() / "presets"
+    errors = []
+
+    for preset_path, message in get_preset_errors():
+        if bundled_dir in preset_path.parents:
+            errors.append(message)
+        else:
+            print("Export Toolset: invalid user preset: " + message)
+
+    if errors:
+        raise PresetError("Invalid export presets:\n" + "\n".join(errors))
+
+
+def load_preset(export_format, export_preset):
+    preset_path = get_preset_path(export_format, export_preset)
+    key = (export_format, export_preset, path.getmtime(preset_path))
+    kwargs = preset_cache.get(key)
+
+    if kwargs is not None:
+        preset_cache_stats["hits"] += 1
+        return kwargs
+
+    preset_cache_stats["misses"] += 1
+
+    # Drop entries of the same preset with an outdated mtime
+    for stale_key in [k for k in preset_cache if k[:2] == key[:2]]:
+        del preset_cache[stale_key]
+
+    fields = parse_preset(preset_path)
+    kwargs = MappingProxyType({f.name: f.value for f in fields})
+    preset_cache[key] = kwargs
+
+    return kwargs
+
+
+def get_preset_hash(export_format, export_preset):
+    preset_path = get_preset_path(export_format, export_preset)
+    key = (export_format, export_preset, path.getmtime(preset_path))
+    digest = preset_hashes.get(key)
+
+    if digest is None:
+        with open(preset_path, 'rb') as file:
+            digest = hashlib.sha1(file.read()).hexdigest()
+
+        preset_hashes[key] = digest
+
+    return digest
+
+
+def get_preset_cache_stats():
+    return dict(preset_cache_stats, size=len(preset_cache))
+
+
+def clear_preset_cache():
+    preset_cache.clear()
+    preset_hashes.clear()
+    preset_cache_stats["hits"] = 0
+    preset_cache_stats["misses"] = 0
+
+
+def get_export_preset(export_properties):
+    export_format = export_properties.format.lower()
+
+    if export_format == "fbx":
+        return export_properties.fbx_preset
+    elif export_format == "obj":
+        return export_properties.obj_preset
+
+
+def get_export_targets(export_properties):
+    """Return (properties, directory, format, preset) of the main export
+    and of every enabled additional target with a folder"""
+    targets = [(export_properties, export_properties.directory,
+                export_properties.format.lower(),
+                get_export_preset(export_properties))]
+
+    for target in export_properties.targets:
+        if target.enabled and target.directory:
+            targets.append((target, target.directory,
+                            target.format.lower(), get_export_preset(target)))
+
+    return targets
+
+
+def get_compression(compression=None):
+    if compression is None:
+        compression = getattr(bpy.context.scene, "ET_compression", "NONE")
+
+    return write_pipeline.get_compression(compression)
+
+
+def get_export_path(directory, file_name, export_format, compression=None):
+    """Return path of the final, possibly compressed, output file"""
+    suffix = write_pipeline.get_output_suffix(
+        export_format, get_compression(compression))
+    return Path(directory) / (file_name + "." + export_format + suffix)
+
+
+def export_scene(directory, file_name, export_preset, export_format,
+                 compression=None, objects=None, backend=None, report=None):
+    """Export objects, the selected ones by default, to directory.
+
+    Exporter messages are sent to report, usually the operator's.
+    """
+    compression = get_compression(compression)
+    filepath = get_export_path(directory, file_name, export_format,
+                               compression)
+
+    if objects is None:
+        objects = bpy.context.selected_objects
+
+    if backend is None:
+        backend = getattr(bpy.context.scene, "ET_export_backend", "OPERATOR")
 
     if filepath:
-        class Container(object):
-            __slots__ = ('__dict__',)
-
-        op = Container()
-        dir = Path(__file__).parent.absolute()
-        preset_path = dir / "presets" / export_format / (export_preset + ".py")
-        file = open(preset_path, 'r')
-
-        # storing the values from the preset on the class
-        for line in file.readlines()[3::]:
-            exec(line, globals(), locals())
-
-        # change preset parameters
-        op.filepath = filepath.as_posix()
-        op.use_selection = True
-
-        if export_format == "fbx":
-            op.use_active_collection = False
-            kwargs = op.__dict__
-            bpy.ops.export_scene.fbx(**kwargs)
-        if export_format == "obj":
-            kwargs = op.__dict__
-            bpy.ops.export_scene.obj(**kwargs)
+        with profiler.stage("preset", file_name):
+            kwargs = load_preset(export_format, export_preset)
+
+        # Write under a staging name in the export folder itself, so that
+        # relative texture paths stay valid, the writer thread moves the
+        # result into place once it is complete
+        staging_name = write_pipeline.get_staging_name(file_name)
+        staging_path = path.join(directory,
+                                 staging_name + "." + export_format)
+
+        try:
+            with profiler.stage("write " + export_format, file_name):
+                export_objects(backend, export_format,
+                               Path(staging_path).as_posix(), objects, kwargs,
+                               report)
+
+            if profiler.enabled and path.exists(staging_path):
+                profiler.record_output(file_name, filepath, objects,
+                                       path.getsize(staging_path))
+        except BaseException:
+            write_pipeline.discard_staged_files(directory, staging_name)
+            raise
+
+        write_pipeline.submit(directory, staging_name, file_name, compression)
 
     return "Export Finished"
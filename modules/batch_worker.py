@@ -0,0 +1,190 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# Background worker for parallel export. Runs inside
+# "blender -b file.blend --python batch_worker.py -- <addon dir> <jobs.json>"
+# and prints one result line per job. Object jobs export an object of the
+# loaded file, library jobs append a shard written with
+# bpy.data.libraries.write into an empty scene and export it.
+
+import importlib
+import json
+import sys
+from os import path
+
+import bpy
+
+RESULT_PREFIX = "ET_RESULT "
+
+
+def report(job, status, message=""):
+    result = {"name": job["name"], "index": job["index"], "status": status,
+              "message": message}
+    sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:]
+    addon_dir, jobs_path = argv[0], argv[1]
+
+    addon_parent, addon_name = path.split(path.normpath(addon_dir))
+
+    if addon_parent not in sys.path:
+        sys.path.append(addon_parent)
+
+    export_preset = importlib.import_module(addon_name + ".export_preset")
+    transforms = importlib.import_module(addon_name + ".modules.transforms")
+
+    with open(jobs_path, 'r') as file:
+        jobs = json.load(file)
+
+    for ob in bpy.context.view_layer.objects:
+        ob.select_set(False)
+
+    for job in jobs:
+        if job.get("kind") == "library":
+            export_library_job(export_preset, transforms, job)
+        else:
+            export_object_job(export_preset, job)
+
+
+def export_job(export_preset, job):
+    # Library jobs list every export target of the shard
+    targets = job.get("targets", [job])
+
+    try:
+        for target in targets:
+            export_preset.export_scene(target["directory"], job["name"],
+                                       target["preset"], target["format"],
+                                       job.get("compression", "NONE"),
+                                       backend=job.get("backend"))
+
+        errors = export_preset.write_pipeline.wait_for_writes()
+    except Exception as e:
+        report(job, "error", str(e))
+    else:
+        if errors:
+            report(job, "error", errors[0])
+        else:
+            report(job, "ok")
+
+
+def export_object_job(export_preset, job):
+    view_layer = bpy.context.view_layer
+    ob = view_layer.objects.get(job["name"])
+
+    if ob is None:
+        report(job, "error", "Object not found in view layer")
+        return
+
+    ob.hide_select = False
+    ob.hide_set(False)
+    ob.hide_viewport = False
+    ob.select_set(True)
+    view_layer.objects.active = ob
+
+    export_job(export_preset, job)
+
+    ob.select_set(False)
+
+
+def get_child_collections(collection):
+    children = [collection]
+
+    for child in collection.children:
+        children.extend(get_child_collections(child))
+
+    return children
+
+
+def remove_library_data(collections, objects):
+    """Remove a shard's appended collections, objects and orphan data"""
+    tree = []
+
+    for collection in collections:
+        for child in get_child_collections(collection):
+            if child not in tree:
+                tree.append(child)
+
+    for ob in objects:
+        bpy.data.objects.remove(ob)
+
+    for child in tree:
+        for ob in list(child.objects):
+            bpy.data.objects.remove(ob)
+
+    for child in reversed(tree):
+        bpy.data.collections.remove(child)
+
+    try:
+        bpy.data.orphans_purge(do_recursive=True)
+    except (AttributeError, TypeError):
+        for datablocks in (bpy.data.meshes, bpy.data.curves,
+                           bpy.data.materials, bpy.data.images,
+                           bpy.data.armatures, bpy.data.actions):
+            for datablock in list(datablocks):
+                if datablock.users == 0:
+                    datablocks.remove(datablock)
+
+
+def export_library_job(export_preset, transforms, job):
+    """Append a shard's collections and objects into an empty scene"""
+    scene = bpy.context.scene
+
+    for ob in list(bpy.data.objects):
+        bpy.data.objects.remove(ob)
+
+    with bpy.data.libraries.load(job["library"], link=False) as (
+            data_from, data_to):
+        data_to.collections = job["collections"]
+        data_to.objects = job["objects"]
+
+    for collection in data_to.collections:
+        scene.collection.children.link(collection)
+        collection.hide_select = False
+        collection.hide_viewport = False
+
+    for ob in data_to.objects:
+        if ob.name not in scene.collection.objects:
+            scene.collection.objects.link(ob)
+
+    view_layer = bpy.context.view_layer
+
+    for ob in view_layer.objects:
+        ob.hide_select = False
+        ob.hide_set(False)
+        ob.hide_viewport = False
+        ob.select_set(True)
+
+    # Same transform reset as an export from the interface
+    if job.get("reset_pos") or job.get("reset_rot"):
+        reset = transforms.TransformReset(view_layer.objects.selected)
+        reset.apply(job.get("reset_pos", False), job.get("reset_rot", False),
+                    job.get("pivot", 'MEDIAN_POINT'))
+        view_layer.update()
+
+    export_job(export_preset, job)
+
+    remove_library_data(data_to.collections, data_to.objects)
+
+
+if __name__ == "__main__":
+    main()
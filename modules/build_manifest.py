@@ -0,0 +1,162 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import json
+import time
+from os import path
+
+import bpy
+
+from .scene_state import get_collection_objects
+
+BUILD_MANIFEST_SUFFIX = ".export_manifest.json"
+BUILD_MANIFEST_VERSION = 1
+
+
+def get_build_manifest_path():
+    """Manifest lives next to the .blend, None for unsaved files"""
+    if not bpy.data.filepath:
+        return None
+
+    return path.splitext(bpy.data.filepath)[0] + BUILD_MANIFEST_SUFFIX
+
+
+def load_build_manifest():
+    """Return {"version", "entries"} or None for unsaved files.
+
+    Entries are keyed "<TYPE>/<name>" and map output files to their
+    format, preset, preset hash, source fingerprint and export time.
+    """
+    manifest_path = get_build_manifest_path()
+
+    if manifest_path is None:
+        return None
+
+    try:
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = {}
+
+    if manifest.get("version") != BUILD_MANIFEST_VERSION:
+        manifest = {"version": BUILD_MANIFEST_VERSION, "entries": {}}
+
+    return manifest
+
+
+def save_build_manifest(manifest):
+    manifest_path = get_build_manifest_path()
+
+    if manifest is None or manifest_path is None:
+        return
+
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+
+
+def get_entry_key(kind, name, members=None):
+    """Multi-object exports are keyed on all their object names"""
+    if members:
+        return "%s/%s[%s]" % (kind, name, ",".join(sorted(members)))
+
+    return kind + "/" + name
+
+
+def record_output(manifest, kind, name, filepath, export_format,
+                  export_preset, preset_hash, fingerprint, members=None):
+    filepath = str(filepath)
+    entries = manifest["entries"]
+    key = get_entry_key(kind, name, members)
+
+    # A file belongs to whatever wrote it last
+    for other_key, entry in list(entries.items()):
+        if other_key != key and filepath in entry["outputs"]:
+            del entry["outputs"][filepath]
+
+            if not entry["outputs"]:
+                del entries[other_key]
+
+    entry = entries.setdefault(key, {"type": kind, "name": name,
+                                     "outputs": {}})
+
+    if members:
+        entry["members"] = sorted(members)
+
+    entry["outputs"][filepath] = {
+        "format": export_format,
+        "preset": export_preset,
+        "preset_hash": preset_hash,
+        "fingerprint": fingerprint,
+        "exported": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def is_output_current(manifest, kind, name, filepath, fingerprint):
+    entry = manifest["entries"].get(get_entry_key(kind, name))
+
+    if entry is None:
+        return False
+
+    output = entry["outputs"].get(str(filepath))
+
+    return (output is not None and
+            output["fingerprint"] == fingerprint and
+            path.exists(filepath))
+
+
+def get_kept_outputs(manifest):
+    """Files last written from several selected objects (SELECTION) or by
+    Export Child Collections (PLAN).
+
+    Export Outdated can't rebuild them from a single object or collection
+    and keeps them.
+    """
+    return {filepath
+            for entry in manifest["entries"].values()
+            if entry["type"] in ('SELECTION', 'PLAN')
+            for filepath in entry["outputs"]}
+
+
+def get_build_sources(view_layer):
+    """Return (type, datablock, objects) of everything with an export
+    folder, objects are limited to the view layer"""
+    sources = []
+
+    for ob in view_layer.objects:
+        if ob.export_properties.directory:
+            sources.append(('OBJECT', ob, [ob]))
+
+    for col in bpy.data.collections:
+        if col.export_properties.directory:
+            sources.append(('COLLECTION', col, get_collection_objects(col)))
+
+    return sources
+
+
+def find_orphaned_outputs(manifest, expected_files):
+    """Recorded files still on disk that nothing exports anymore"""
+    orphaned = []
+
+    for entry in manifest["entries"].values():
+        for filepath in entry["outputs"]:
+            if filepath not in expected_files and path.exists(filepath):
+                orphaned.append(filepath)
+
+    return sorted(orphaned)
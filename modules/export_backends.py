@@ -0,0 +1,217 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import bpy
+from bpy_extras.io_utils import axis_conversion
+from mathutils import Matrix
+
+from .mesh_cache import mesh_cache
+from .obj_writer import get_unsupported_options, write_mtl, write_obj
+
+# Preset values only the operators understand
+operator_only_props = ("filepath", "check_existing", "filter_glob", "ui_tab",
+                       "use_selection", "use_active_collection", "batch_mode",
+                       "use_batch_own_dir")
+
+# Operator keyword -> io_scene_obj.export_obj.write_file keyword
+obj_write_file_props = {
+    "use_triangles": "EXPORT_TRI",
+    "use_edges": "EXPORT_EDGES",
+    "use_smooth_groups": "EXPORT_SMOOTH_GROUPS",
+    "use_smooth_groups_bitflags": "EXPORT_SMOOTH_GROUPS_BITFLAGS",
+    "use_normals": "EXPORT_NORMALS",
+    "use_uvs": "EXPORT_UV",
+    "use_materials": "EXPORT_MTL",
+    "use_mesh_modifiers": "EXPORT_APPLY_MODIFIERS",
+    "use_mesh_modifiers_render": "EXPORT_APPLY_MODIFIERS_RENDER",
+    "use_blen_objects": "EXPORT_BLEN_OBS",
+    "group_by_object": "EXPORT_GROUP_BY_OB",
+    "group_by_material": "EXPORT_GROUP_BY_MAT",
+    "keep_vertex_order": "EXPORT_KEEP_VERT_ORDER",
+    "use_vertex_groups": "EXPORT_POLYGROUPS",
+    "use_nurbs": "EXPORT_CURVE_AS_NURBS",
+    "path_mode": "EXPORT_PATH_MODE",
+}
+
+
+def get_obj_global_matrix(kwargs):
+    """Same conversion as the OBJ export operator"""
+    return (Matrix.Scale(kwargs.get("global_scale", 1.0), 4) @
+            axis_conversion(to_forward=kwargs.get("axis_forward", '-Z'),
+                            to_up=kwargs.get("axis_up", 'Y')).to_4x4())
+
+
+class BackendUnavailable(Exception):
+    """The backend can't export with these settings, use another one"""
+    pass
+
+
+def print_report(type, message):
+    """Console fallback when no operator is there to report to"""
+    print("Export Toolset: %s: %s" % (", ".join(sorted(type)), message))
+
+
+class OperatorShim:
+    """Stands in for the export operator the exporter modules report to,
+    forwarding messages to the calling operator's report"""
+
+    def __init__(self, report=None):
+        self.report = report or print_report
+
+
+class OperatorBackend:
+    """Export through bpy.ops, works with any exporter version"""
+
+    def export(self, export_format, filepath, objects, kwargs, report):
+        kwargs = dict(kwargs)
+        kwargs["filepath"] = filepath
+        kwargs["use_selection"] = True
+
+        if export_format == "fbx":
+            kwargs["use_active_collection"] = False
+            bpy.ops.export_scene.fbx(**kwargs)
+        if export_format == "obj":
+            bpy.ops.export_scene.obj(**kwargs)
+
+
+class DirectBackend:
+    """Call the exporter modules with a prebuilt object list, skipping
+    operator lookup, context checks and selection filtering"""
+
+    def export(self, export_format, filepath, objects, kwargs, report):
+        # Checked before batch_mode is dropped with the operator options
+        if kwargs.get("use_animation") or \
+                kwargs.get("batch_mode", 'OFF') != 'OFF':
+            raise BackendUnavailable("animation and batch mode need "
+                                     "the operator")
+
+        kwargs = {key: value for key, value in kwargs.items()
+                  if key not in operator_only_props}
+
+        context = bpy.context
+        depsgraph = context.evaluated_depsgraph_get()
+
+        try:
+            if export_format == "fbx":
+                self.export_fbx(context, depsgraph, filepath, objects, kwargs,
+                                report)
+            elif export_format == "obj":
+                self.export_obj(context, depsgraph, filepath, objects, kwargs)
+            else:
+                raise BackendUnavailable("unknown format " + export_format)
+        except (ImportError, AttributeError) as e:
+            raise BackendUnavailable(str(e))
+
+    def export_fbx(self, context, depsgraph, filepath, objects, kwargs,
+                   report):
+        from io_scene_fbx import export_fbx_bin
+
+        # Same conversion as the FBX export operator
+        if kwargs.get("use_space_transform", True):
+            kwargs["global_matrix"] = axis_conversion(
+                to_forward=kwargs.get("axis_forward", '-Z'),
+                to_up=kwargs.get("axis_up", 'Y')).to_4x4()
+        else:
+            kwargs["global_matrix"] = Matrix()
+
+        try:
+            export_fbx_bin.save_single(
+                OperatorShim(report), context.scene, depsgraph, filepath,
+                context_objects=objects, **kwargs)
+        except TypeError as e:
+            raise BackendUnavailable(str(e))
+
+    def export_obj(self, context, depsgraph, filepath, objects, kwargs):
+        from io_scene_obj import export_obj
+
+        global_matrix = get_obj_global_matrix(kwargs)
+
+        write_kwargs = {obj_write_file_props[key]: value
+                        for key, value in kwargs.items()
+                        if key in obj_write_file_props}
+
+        try:
+            export_obj.write_file(
+                filepath, objects, depsgraph, context.scene,
+                EXPORT_GLOBAL_MATRIX=global_matrix, **write_kwargs)
+        except TypeError as e:
+            raise BackendUnavailable(str(e))
+
+
+class FastObjBackend:
+    """Built-in OBJ writer reading meshes in bulk with NumPy"""
+
+    def export(self, export_format, filepath, objects, kwargs, report):
+        if export_format != "obj":
+            raise BackendUnavailable("only writes OBJ")
+
+        unsupported = get_unsupported_options(objects, kwargs)
+
+        if unsupported:
+            raise BackendUnavailable(
+                "unsupported options " + ", ".join(unsupported))
+
+        materials = write_obj(
+            filepath, objects, bpy.context.evaluated_depsgraph_get(),
+            get_obj_global_matrix(kwargs), kwargs,
+            mesh_reader=mesh_cache.read_mesh)
+
+        if kwargs.get("use_materials", True):
+            write_mtl(filepath[:-len(".obj")] + ".mtl", materials,
+                      kwargs.get("path_mode", 'AUTO'))
+
+
+backends = {
+    "OPERATOR": OperatorBackend(),
+    "DIRECT": DirectBackend(),
+    "FAST": FastObjBackend(),
+}
+
+# Backend tried next when one can't handle an export
+fallbacks = {
+    "FAST": "DIRECT",
+    "DIRECT": "OPERATOR",
+}
+
+
+def export_objects(backend, export_format, filepath, objects, kwargs,
+                   report=None):
+    """Export objects with the given backend, falling back to slower ones.
+
+    Messages go to report, an operator's report method, or the console.
+    Return the name of the backend that wrote the file.
+    """
+    report = report or print_report
+
+    while backend in fallbacks:
+        try:
+            backends[backend].export(export_format, filepath, objects, kwargs,
+                                     report)
+            return backend
+        except BackendUnavailable as e:
+            report({'INFO'}, "%s export unavailable, using %s: %s" % (
+                backend.title(), fallbacks[backend].title(), e))
+
+        backend = fallbacks[backend]
+
+    backends["OPERATOR"].export(export_format, filepath, objects, kwargs,
+                                report)
+    return "OPERATOR"
@@ -0,0 +1,90 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from collections import namedtuple
+
+# Objects directly inside the parent are written to "<parent>_loose"
+LOOSE_SUFFIX = "_loose"
+
+# One output file of a collection export plan. Objects already claimed by
+# an earlier entry are left out and only counted as shared.
+PlanEntry = namedtuple('PlanEntry', ('name', 'export_properties', 'objects',
+                                     'polygons', 'shared'))
+
+
+def count_polygons(objects):
+    return sum(len(ob.data.polygons) for ob in objects if ob.type == 'MESH')
+
+
+def collect_subtree_objects(collection, memo):
+    """Objects of a collection and all its children keyed by pointer.
+
+    Collections linked under several parents are walked only once.
+    """
+    pointer = collection.as_pointer()
+
+    if pointer not in memo:
+        objects = {}
+
+        for col in collection.children:
+            objects.update(collect_subtree_objects(col, memo))
+
+        for ob in collection.objects:
+            objects[ob.as_pointer()] = ob
+
+        memo[pointer] = objects
+
+    return memo[pointer]
+
+
+def build_export_plan(collection):
+    """Plan one file per child collection of the given collection.
+
+    Children without an export folder use the export properties of the
+    parent. Objects directly inside the parent form one more file, named
+    with a suffix so it doesn't replace the whole collection's export.
+    """
+    memo = {}
+    claimed = set()
+    plan = []
+
+    targets = [(child.name, child, collect_subtree_objects(child, memo))
+               for child in collection.children]
+
+    if len(collection.objects) > 0:
+        targets.append((collection.name + LOOSE_SUFFIX, collection,
+                        {ob.as_pointer(): ob for ob in collection.objects}))
+
+    for name, col, objects in targets:
+        export_properties = col.export_properties
+
+        if export_properties.directory == "":
+            export_properties = collection.export_properties
+
+        unique = [ob for pointer, ob in objects.items()
+                  if pointer not in claimed]
+        claimed.update(objects)
+
+        plan.append(PlanEntry(name, export_properties, unique,
+                              count_polygons(unique),
+                              len(objects) - len(unique)))
+
+    return plan
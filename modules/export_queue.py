@@ -0,0 +1,171 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import heapq
+import itertools
+from collections import namedtuple
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .fingerprint import save_manifest
+from .scene_state import SceneState, get_collection_objects
+from .target_export import export_targets
+from .transforms import TransformReset
+
+# Jobs are ordered by estimated cost so that small exports finish first.
+# Objects and collections are referenced by name, as datablock references
+# may become invalid between timer ticks. Every (target, fingerprint)
+# pair of a job is exported from the same prepared scene.
+ExportJob = namedtuple('ExportJob', (
+    'cost', 'order', 'kind', 'file_name', 'names', 'targets', 'reset'))
+
+
+def estimate_cost(objects):
+    cost = 0
+
+    for ob in objects:
+        cost += len(ob.data.polygons) if ob.type == 'MESH' else 1
+
+    return cost
+
+
+class ExportQueue:
+    def __init__(self):
+        self.jobs = []
+        self.counter = itertools.count()
+        self.running = False
+        self.cancelled = False
+        self.paused = False
+        self.done = 0
+        self.total = 0
+        self.failed = []
+
+    def push(self, kind, file_name, datablocks, pending, reset=False):
+        if kind == 'COLLECTION':
+            objects = get_collection_objects(datablocks[0])
+        else:
+            objects = datablocks
+
+        # Export properties are not kept, only plain target values
+        targets = tuple(((None,) + tuple(target[1:]), fingerprint)
+                        for target, fingerprint in pending)
+
+        job = ExportJob(
+            estimate_cost(objects), next(self.counter), kind, file_name,
+            tuple(datablock.name for datablock in datablocks), targets,
+            reset)
+
+        heapq.heappush(self.jobs, job)
+        self.total += 1
+
+    def pop(self):
+        return heapq.heappop(self.jobs) if self.jobs else None
+
+    def clear(self):
+        self.jobs.clear()
+        self.cancelled = False
+        self.paused = False
+        self.done = 0
+        self.total = 0
+        self.failed.clear()
+
+    def progress(self):
+        return self.done / self.total if self.total else 0.0
+
+
+export_queue = ExportQueue()
+
+
+def get_build_kind(job):
+    """Return build manifest type and member names of a job"""
+    if job.kind == 'COLLECTION':
+        return 'COLLECTION', None
+    if len(job.names) > 1:
+        return 'SELECTION', list(job.names)
+
+    return 'OBJECT', None
+
+
+def run_job(context, job, build_manifest=None, report=None, state=None):
+    """Export a single queued job, return an error message or None.
+
+    Exported files are recorded in build_manifest, saving it is left to
+    the caller. A SceneState shared by the whole queue run is restored by
+    the caller, without one the job takes and restores its own.
+    """
+    own_state = state is None
+
+    if own_state:
+        state = SceneState(context.view_layer)
+
+    if job.kind == 'COLLECTION':
+        collection = bpy.data.collections.get(job.names[0])
+
+        if collection is None:
+            return "Collection not found"
+
+        objects = state.prepare_collection(collection)
+    else:
+        objects = [context.view_layer.objects.get(name) for name in job.names]
+        objects = [ob for ob in objects if ob is not None]
+
+        if not objects:
+            return "Objects not found in view layer"
+
+    state.select(objects, active=objects[0])
+
+    scene = context.scene
+    manifests = {} if scene.ET_skip_unchanged else None
+    kind, members = get_build_kind(job)
+    reset = None
+
+    if job.reset and (scene.ET_reset_pos or scene.ET_reset_rot):
+        reset = TransformReset(context.view_layer.objects.selected)
+        reset.apply(scene.ET_reset_pos, scene.ET_reset_rot,
+                    scene.tool_settings.transform_pivot_point)
+        context.view_layer.update()
+
+    try:
+        results = export_targets(job.file_name, job.targets, manifests,
+                                 build_manifest, kind, members,
+                                 report=report)
+    finally:
+        if reset is not None:
+            reset.restore()
+
+        if own_state:
+            state.restore()
+
+    if manifests:
+        for directory, manifest in manifests.items():
+            save_manifest(directory, manifest)
+
+    errors = ["%s (%s)" % (error, target[1])
+              for target, error in results if error is not None]
+
+    return "; ".join(errors) if errors else None
+
+
+@persistent
+def clear_export_queue(dummy):
+    export_queue.clear()
+    export_queue.running = False
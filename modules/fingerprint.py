@@ -0,0 +1,145 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import hashlib
+import json
+from array import array
+from os import path
+
+from ..export_preset import get_export_path, get_preset_hash
+from .profiler import profiled
+
+MANIFEST_NAME = ".export_toolset_manifest.json"
+
+
+def hash_mesh(digest, mesh):
+    vertex_count = len(mesh.vertices)
+    digest.update(("%d %d" % (vertex_count, len(mesh.polygons))).encode())
+
+    co = array('f', [0.0]) * (vertex_count * 3)
+    mesh.vertices.foreach_get('co', co)
+    digest.update(co.tobytes())
+
+
+def hash_modifiers(digest, obj):
+    for mod in obj.modifiers:
+        digest.update(mod.type.encode())
+
+        for prop in mod.bl_rna.properties:
+            if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+                continue
+
+            value = getattr(mod, prop.identifier)
+
+            if prop.type == 'POINTER':
+                value = getattr(value, 'name', None)
+            elif getattr(prop, 'array_length', 0):
+                value = tuple(value)
+
+            digest.update(repr((prop.identifier, value)).encode())
+
+
+def update_object_digest(digest, obj):
+    digest.update(obj.name.encode())
+    digest.update(obj.type.encode())
+    digest.update(repr([tuple(row) for row in obj.matrix_world]).encode())
+
+    if obj.type == 'MESH':
+        hash_mesh(digest, obj.data)
+    elif obj.data is not None:
+        digest.update(obj.data.name.encode())
+
+    hash_modifiers(digest, obj)
+
+    materials = [slot.material.name if slot.material else ""
+                 for slot in obj.material_slots]
+    digest.update(repr(materials).encode())
+
+
+@profiled("fingerprint")
+def objects_data_hash(objects):
+    """Hash of the objects alone, shared by fingerprints of all targets"""
+    digest = hashlib.sha1()
+
+    for obj in sorted(objects, key=lambda ob: ob.name):
+        update_object_digest(digest, obj)
+
+    return digest.hexdigest()
+
+
+def instances_data_hash(objects):
+    """Hash of objects sharing data, the data is hashed once and every
+    instance adds its name and transform"""
+    objects = sorted(objects, key=lambda ob: ob.name)
+    digest = hashlib.sha1(objects_data_hash(objects[:1]).encode())
+
+    for obj in objects[1:]:
+        digest.update(obj.name.encode())
+        digest.update(repr([tuple(row) for row in obj.matrix_world]).encode())
+
+    return digest.hexdigest()
+
+
+def objects_fingerprint(objects, export_preset, export_format,
+                        data_hash=None):
+    if data_hash is None:
+        data_hash = objects_data_hash(objects)
+
+    digest = hashlib.sha1()
+    digest.update(export_format.encode())
+    digest.update(export_preset.encode())
+    digest.update(get_preset_hash(export_format, export_preset).encode())
+    digest.update(data_hash.encode())
+
+    return digest.hexdigest()
+
+
+def load_manifest(directory):
+    manifest_path = path.join(directory, MANIFEST_NAME)
+
+    try:
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(directory, manifest):
+    manifest_path = path.join(directory, MANIFEST_NAME)
+
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+
+
+def get_manifest_key(file_name, export_format):
+    """Entries are per output file, so targets sharing a folder don't clash"""
+    return file_name + "." + export_format
+
+
+def record_fingerprint(manifest, file_name, export_format, fingerprint):
+    manifest[get_manifest_key(file_name, export_format)] = fingerprint
+
+
+def is_up_to_date(manifest, directory, file_name, export_format, fingerprint):
+    key = get_manifest_key(file_name, export_format)
+
+    return (manifest.get(key) == fingerprint and
+            path.exists(get_export_path(directory, file_name, export_format)))
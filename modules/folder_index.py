@@ -0,0 +1,123 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import json
+from os import path
+
+import bpy
+from bpy.app.handlers import persistent
+
+INDEX_PROP = "ET_folder_index"
+
+# Export folder path to the number of objects and collections using it
+folder_counts = {}
+# Enum items for WindowManager.ET_recent_folders, must stay referenced
+recent_folders = []
+# Duplicating, deleting, pasting and undo bypass the directory setter, so
+# counts are only a hint: folders found missing are added as they are
+# drawn and a full rescan runs only when no index could be loaded
+index_state = {"stale": True}
+
+
+def rebuild_recent_folders():
+    recent_folders.clear()
+
+    for dir_path in sorted(folder_counts):
+        dir_name = path.basename(path.normpath(dir_path))
+        recent_folders.append((dir_path, dir_name, ''))
+
+
+def add_folder(dir_path):
+    if dir_path in folder_counts:
+        folder_counts[dir_path] += 1
+    else:
+        folder_counts[dir_path] = 1
+        rebuild_recent_folders()
+
+
+def remove_folder(dir_path):
+    count = folder_counts.get(dir_path)
+
+    if count is None:
+        return
+
+    if count > 1:
+        folder_counts[dir_path] = count - 1
+    else:
+        del folder_counts[dir_path]
+        rebuild_recent_folders()
+
+
+def move_folder(old_path, new_path):
+    if old_path == new_path:
+        return
+
+    if old_path:
+        remove_folder(old_path)
+
+    if new_path:
+        add_folder(new_path)
+
+
+def collect_recent_folders():
+    folder_counts.clear()
+
+    for datablocks in (bpy.data.objects, bpy.data.collections):
+        for datablock in datablocks:
+            dir_path = datablock.export_properties.directory
+
+            if dir_path:
+                folder_counts[dir_path] = folder_counts.get(dir_path, 0) + 1
+
+    rebuild_recent_folders()
+    index_state["stale"] = False
+
+
+def ensure_folder_index(dir_path=""):
+    """Make sure the index exists and lists dir_path, the drawn folder"""
+    # Files saved without the index are scanned once, on first use
+    if index_state["stale"]:
+        collect_recent_folders()
+    elif dir_path and dir_path not in folder_counts:
+        add_folder(dir_path)
+
+
+@persistent
+def load_folder_index(dummy):
+    data = bpy.context.scene.get(INDEX_PROP)
+    folder_counts.clear()
+
+    try:
+        folder_counts.update(json.loads(data)["folders"])
+    except (TypeError, ValueError, KeyError):
+        index_state["stale"] = True
+    else:
+        index_state["stale"] = False
+
+    rebuild_recent_folders()
+
+
+@persistent
+def save_folder_index(dummy):
+    if not index_state["stale"]:
+        bpy.context.scene[INDEX_PROP] = json.dumps(
+            {"folders": folder_counts}, separators=(',', ':'),
+            sort_keys=True)
@@ -0,0 +1,54 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from bpy.app.handlers import persistent
+
+# Collection pointer to LayerCollection, one dict per view layer
+layer_indices = {}
+
+
+def build_layer_index(layer_collection, index):
+    index[layer_collection.collection.as_pointer()] = layer_collection
+
+    for child in layer_collection.children:
+        build_layer_index(child, index)
+
+
+def get_layer_index(view_layer):
+    key = view_layer.as_pointer()
+    index = layer_indices.get(key)
+
+    if index is None:
+        index = {}
+        build_layer_index(view_layer.layer_collection, index)
+        layer_indices[key] = index
+
+    return index
+
+
+def get_layer_collection(view_layer, collection):
+    return get_layer_index(view_layer).get(collection.as_pointer())
+
+
+@persistent
+def invalidate_layer_index(*args):
+    # Undo and redo reallocate collections, cached pointers become stale
+    layer_indices.clear()
@@ -0,0 +1,303 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import json
+import os
+import struct
+import sys
+import threading
+import zipfile
+from array import array
+
+from bpy.app.handlers import persistent
+
+transform_props = ("location", "rotation_euler", "dimensions")
+json_keys = ("location", "rotation", "size")
+chunk_size = 1000
+
+# Writers not collected yet, in start order
+active_writers = []
+
+
+def read_transforms(objects):
+    """Read transforms of a collection of objects into flat float arrays"""
+    count = len(objects)
+    transforms = []
+
+    for prop in transform_props:
+        values = array('f', [0.0]) * (count * 3)
+
+        if hasattr(objects, "foreach_get"):
+            objects.foreach_get(prop, values)
+        else:
+            for i, ob in enumerate(objects):
+                values[i * 3:i * 3 + 3] = array('f', getattr(ob, prop))
+
+        transforms.append(values)
+
+    return transforms
+
+
+def group_instances(objects):
+    """Group objects sharing data, return [(asset name, objects)]"""
+    groups = {}
+
+    for ob in sorted(objects, key=lambda ob: ob.name):
+        key = ob.data.as_pointer() if ob.data is not None else ob.as_pointer()
+        groups.setdefault(key, []).append(ob)
+
+    # Data names are unique per type, objects without data use their own
+    names = set()
+    result = []
+
+    for group in groups.values():
+        ob = group[0]
+        name = base = ob.data.name if ob.data is not None else ob.name
+        suffix = 1
+
+        while name in names:
+            name = "%s_%d" % (base, suffix)
+            suffix += 1
+
+        names.add(name)
+        result.append((name, group))
+
+    return result
+
+
+def json_record(name, transforms, i):
+    data = {}
+
+    for key, values in zip(json_keys, transforms):
+        x, y, z = values[i * 3:i * 3 + 3]
+        data[key] = {"x": x, "y": y, "z": z}
+
+    return {name: data}
+
+
+def write_json(file, names, transforms, compact=False):
+    if compact:
+        header, separator, footer = '{"Linked Transform Data":[', ',', ']}\n'
+    else:
+        header = '{\n    "Linked Transform Data": [\n'
+        separator = ',\n'
+        footer = '\n    ]\n}\n'
+
+    if not names:
+        file.write('{"Linked Transform Data":[]}\n' if compact else
+                   '{\n    "Linked Transform Data": []\n}\n')
+        return
+
+    file.write(header)
+    chunk = []
+    written = 0
+
+    for i, name in enumerate(names):
+        record = json_record(name, transforms, i)
+
+        if compact:
+            text = json.dumps(record, separators=(',', ':'))
+        else:
+            text = json.dumps(record, indent=4).replace('\n', '\n        ')
+            text = '        ' + text
+
+        chunk.append(text)
+
+        if len(chunk) == chunk_size or i == len(names) - 1:
+            if written:
+                file.write(separator)
+
+            file.write(separator.join(chunk))
+            written += len(chunk)
+            chunk.clear()
+
+    file.write(footer)
+
+
+def write_ndjson(file, names, transforms, compact=True):
+    chunk = []
+
+    for i, name in enumerate(names):
+        record = {"name": name}
+
+        for key, values in zip(json_keys, transforms):
+            record[key] = list(values[i * 3:i * 3 + 3])
+
+        chunk.append(json.dumps(record, separators=(',', ':')) + '\n')
+
+        if len(chunk) == chunk_size:
+            file.write(''.join(chunk))
+            chunk.clear()
+
+    file.write(''.join(chunk))
+
+
+def little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def write_binary(file, names, transforms, compact=True):
+    """Header, float32 location/rotation/dimensions arrays, name table.
+
+    All values are little-endian:
+        char[4] magic "ETLD", uint32 version, uint32 object count
+        float32[count * 3] location, rotation, dimensions
+        count * (uint32 byte length, utf-8 name)
+    """
+    file.write(b"ETLD" + struct.pack("<II", 1, len(names)))
+
+    for values in transforms:
+        file.write(little_endian(values))
+
+    for name in names:
+        data = name.encode('utf-8')
+        file.write(struct.pack("<I", len(data)) + data)
+
+
+def npy_bytes(descr, shape, data):
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': %s, }" % (
+        descr, repr(shape))
+    # Magic, version and header length take 10 bytes, pad to 64
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + " " * (padding % 64) + "\n"
+
+    return (b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) +
+            header.encode('latin1') + data)
+
+
+def write_npz(file, names, transforms, compact=True):
+    """NumPy .npz archive with one (count, 3) float32 array per transform"""
+    count = len(names)
+    arrays = [(key + ".npy", npy_bytes('<f4', (count, 3), little_endian(values)))
+              for key, values in zip(json_keys, transforms)]
+
+    width = max([len(name) for name in names] + [1])
+    data = b"".join(name.ljust(width, "\0").encode('utf-32-le')
+                    for name in names)
+    arrays.append(("names.npy", npy_bytes('<U%d' % width, (count,), data)))
+
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_STORED) as archive:
+        for entry_name, data in arrays:
+            # Fixed timestamp keeps the archive identical between runs
+            info = zipfile.ZipInfo(entry_name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, data)
+
+
+# Format identifier to (file extension, open mode, writer)
+formats = {
+    "JSON": (".json", 'w', write_json),
+    "NDJSON": (".ndjson", 'w', write_ndjson),
+    "BINARY": (".etld", 'wb', write_binary),
+    "NPZ": (".npz", 'wb', write_npz),
+}
+
+
+class TransformWriter(threading.Thread):
+    """Serialize transforms next to the target and rename it into place,
+    after the previous writer of the same file has finished"""
+
+    def __init__(self, file_path, names, transforms, data_format="JSON",
+                 compact=False, previous=None):
+        super().__init__()
+        self.file_path = file_path
+        self.data_format = data_format
+        self.names = names
+        self.transforms = transforms
+        self.compact = compact
+        self.previous = previous
+        self.error = None
+
+    def run(self):
+        _, mode, writer = formats[self.data_format]
+        partial = self.file_path + ".partial"
+
+        if self.previous is not None:
+            self.previous.join()
+            self.previous = None
+
+        try:
+            # Fixed newlines so text output is identical on every platform
+            with open(partial, mode,
+                      **({} if 'b' in mode else {"newline": '\n'})) as file:
+                writer(file, self.names, self.transforms, self.compact)
+
+            os.replace(partial, self.file_path)
+        except OSError as e:
+            self.error = e
+
+            if os.path.exists(partial):
+                os.remove(partial)
+
+
+def finish_writer(writer):
+    """Wait for a writer, return its error or None"""
+    writer.join()
+
+    if writer in active_writers:
+        active_writers.remove(writer)
+
+    return writer.error
+
+
+def join_writers():
+    """Wait for every writer, return [(file path, error)] of failed ones"""
+    errors = []
+
+    for writer in active_writers[:]:
+        error = finish_writer(writer)
+
+        if error is not None:
+            errors.append((writer.file_path, error))
+
+    return errors
+
+
+@persistent
+def join_linked_data_writers(dummy):
+    # Files must be complete before the .blend referencing them is saved,
+    # errors are reported by the operators that started the writers
+    for writer in active_writers:
+        writer.join()
+
+
+def write_linked_data(file_path, objects, data_format="JSON", compact=False):
+    """Read transforms on the main thread, serialize them on a worker"""
+    names = [ob.name for ob in objects]
+    transforms = read_transforms(objects)
+
+    # Writes to the same file happen in the order they were started
+    previous = None
+
+    for writer in active_writers:
+        if writer.file_path == file_path and writer.is_alive():
+            previous = writer
+
+    writer = TransformWriter(file_path, names, transforms, data_format,
+                             compact, previous)
+    writer.start()
+    active_writers.append(writer)
+
+    return writer
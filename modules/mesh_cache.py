@@ -0,0 +1,151 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import time
+from collections import OrderedDict
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .obj_writer import read_mesh
+
+
+class MeshCache:
+    """Evaluated meshes read by the fast OBJ writer.
+
+    Entries are keyed on the object and the number of geometry updates
+    the depsgraph reported for it. Entries of an edited object are dropped
+    on its update and all entries on a frame change. The least recently
+    used entries are dropped once the arrays exceed the memory budget.
+    """
+
+    def __init__(self, budget=512 * 1024 * 1024):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.size = 0
+        self.update_counters = {}
+        # Object pointer to the keys of its entries
+        self.object_keys = {}
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def get_key(self, ob, options):
+        pointer = ob.original.as_pointer()
+
+        return (pointer, ob.name, self.update_counters.get(pointer, 0),
+                options.get("use_mesh_modifiers", True),
+                options.get("use_normals", False),
+                options.get("use_uvs", True),
+                options.get("use_triangles", False))
+
+    def read_mesh(self, ob, depsgraph, options):
+        key = self.get_key(ob, options)
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+            return entry[0]
+
+        start = time.perf_counter()
+        data = read_mesh(ob, depsgraph, options)
+        self.misses += 1
+
+        if data is not None:
+            self.add(key, data, time.perf_counter() - start)
+
+        return data
+
+    def add(self, key, data, seconds):
+        size = sum(array.nbytes for array in data if array is not None)
+
+        if size > self.budget:
+            return
+
+        self.entries[key] = (data, size, seconds)
+        self.object_keys.setdefault(key[0], set()).add(key)
+        self.size += size
+        self.evict()
+
+    def remove(self, key):
+        _, size, _ = self.entries.pop(key)
+        self.size -= size
+        keys = self.object_keys[key[0]]
+        keys.discard(key)
+
+        if not keys:
+            del self.object_keys[key[0]]
+
+    def evict(self):
+        while self.size > self.budget and self.entries:
+            self.remove(next(iter(self.entries)))
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.evict()
+
+    def tag_update(self, ob):
+        pointer = ob.original.as_pointer()
+        self.update_counters[pointer] = self.update_counters.get(pointer, 0) + 1
+
+        # Entries of the previous geometry can't be reached anymore
+        for key in list(self.object_keys.get(pointer, ())):
+            self.remove(key)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a frame change"""
+        self.entries.clear()
+        self.object_keys.clear()
+        self.size = 0
+
+    def clear(self):
+        self.invalidate()
+        self.update_counters.clear()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+
+mesh_cache = MeshCache()
+
+
+@persistent
+def track_mesh_updates(scene, depsgraph=None):
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object) and \
+                update.is_updated_geometry:
+            mesh_cache.tag_update(update.id)
+
+
+@persistent
+def invalidate_mesh_cache(scene, depsgraph=None):
+    mesh_cache.invalidate()
+
+
+@persistent
+def clear_mesh_cache(*args):
+    # Undo and redo reallocate objects, cached entries are keyed by pointer
+    mesh_cache.clear()
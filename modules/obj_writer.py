@@ -0,0 +1,326 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from collections import namedtuple
+from os import path
+
+import bpy
+import numpy as np
+from bpy_extras import io_utils, node_shader_utils
+
+# Rows formatted by a single string operation
+chunk_size = 65536
+
+mesh_types = {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}
+
+# Preset options this writer doesn't implement
+unsupported_options = ("use_smooth_groups", "use_smooth_groups_bitflags",
+                       "use_vertex_groups", "group_by_material",
+                       "use_animation")
+
+# Mesh arrays in object space. Faces are given as loop indices, either
+# polygons or loop triangles depending on use_triangles.
+MeshData = namedtuple('MeshData', (
+    'positions', 'loop_vertices', 'loop_normals', 'loop_uvs',
+    'face_loops', 'face_sizes', 'face_materials', 'loose_edges'))
+
+
+def get_unsupported_options(objects, options):
+    unsupported = [name for name in unsupported_options
+                   if options.get(name)]
+
+    if options.get("use_nurbs") and any(ob.type == 'CURVE' for ob in objects):
+        unsupported.append("use_nurbs")
+
+    return unsupported
+
+
+def name_compat(name):
+    if name is None:
+        return "None"
+
+    return name.replace(" ", "_")
+
+
+def foreach_array(collection, prop, count, dtype, width=1):
+    values = np.empty(count * width, dtype=dtype)
+
+    if count:
+        collection.foreach_get(prop, values)
+
+    return values.reshape(-1, width) if width > 1 else values
+
+
+def read_mesh_data(mesh, use_normals, use_uvs, use_triangles):
+    """Read everything the writer needs from a mesh in bulk"""
+    vertex_count = len(mesh.vertices)
+    loop_count = len(mesh.loops)
+    edge_count = len(mesh.edges)
+
+    positions = foreach_array(mesh.vertices, 'co', vertex_count,
+                              np.float32, 3)
+    loop_vertices = foreach_array(mesh.loops, 'vertex_index', loop_count,
+                                  np.int32)
+
+    if use_triangles:
+        mesh.calc_loop_triangles()
+        triangles = mesh.loop_triangles
+        face_loops = foreach_array(triangles, 'loops', len(triangles),
+                                   np.int32, 3).ravel()
+        face_sizes = np.full(len(triangles), 3, dtype=np.int32)
+        face_materials = foreach_array(triangles, 'material_index',
+                                       len(triangles), np.int32)
+    else:
+        polygons = mesh.polygons
+        loop_starts = foreach_array(polygons, 'loop_start', len(polygons),
+                                    np.int32)
+        face_sizes = foreach_array(polygons, 'loop_total', len(polygons),
+                                   np.int32)
+        face_materials = foreach_array(polygons, 'material_index',
+                                       len(polygons), np.int32)
+
+        # Loops of each polygon, in polygon order
+        corner_starts = np.cumsum(face_sizes) - face_sizes
+        face_loops = (np.repeat(loop_starts - corner_starts, face_sizes) +
+                      np.arange(face_sizes.sum(), dtype=np.int32))
+
+    loop_normals = None
+
+    if use_normals:
+        if hasattr(mesh, "calc_normals_split"):
+            mesh.calc_normals_split()
+            loop_normals = foreach_array(mesh.loops, 'normal', loop_count,
+                                         np.float32, 3)
+        else:
+            loop_normals = foreach_array(mesh.corner_normals, 'vector',
+                                         loop_count, np.float32, 3)
+
+    loop_uvs = None
+    uv_layer = mesh.uv_layers.active
+
+    if use_uvs and uv_layer is not None:
+        loop_uvs = foreach_array(uv_layer.data, 'uv', loop_count,
+                                 np.float32, 2)
+
+    is_loose = foreach_array(mesh.edges, 'is_loose', edge_count, bool)
+    edges = foreach_array(mesh.edges, 'vertices', edge_count, np.int32, 2)
+
+    return MeshData(positions, loop_vertices, loop_normals, loop_uvs,
+                    face_loops, face_sizes, face_materials, edges[is_loose])
+
+
+def read_mesh(ob, depsgraph, options):
+    """Return MeshData of an object, None if it has no geometry"""
+    if options.get("use_mesh_modifiers", True):
+        ob = ob.evaluated_get(depsgraph)
+
+    try:
+        mesh = ob.to_mesh()
+    except RuntimeError:
+        return None
+
+    if mesh is None:
+        return None
+
+    try:
+        return read_mesh_data(mesh, options.get("use_normals", False),
+                              options.get("use_uvs", True),
+                              options.get("use_triangles", False))
+    finally:
+        ob.to_mesh_clear()
+
+
+def write_rows(file, row_format, rows):
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        file.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def write_faces(file, corners, token, data, material_names, used_materials,
+                use_materials, flip):
+    sizes = data.face_sizes
+    materials = data.face_materials
+
+    if not len(sizes):
+        return
+
+    corner_starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    # Consecutive faces with the same size and material form one run
+    breaks = np.flatnonzero((sizes[1:] != sizes[:-1]) |
+                            (materials[1:] != materials[:-1])) + 1
+    run_starts = np.concatenate(([0], breaks))
+    run_ends = np.append(breaks, len(sizes))
+    current_material = -1
+
+    for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+        material_index = int(materials[start])
+
+        if use_materials and material_index != current_material:
+            current_material = material_index
+            name = None
+
+            if material_index < len(material_names):
+                name = material_names[material_index]
+
+            if name is None:
+                file.write("usemtl (null)\n")
+            else:
+                file.write("usemtl %s\n" % name)
+                used_materials.setdefault(name, material_index)
+
+        size = int(sizes[start])
+        run = corners[corner_starts[start]:corner_starts[end]]
+        run = run.reshape(end - start, size, corners.shape[1])
+
+        # Mirrored objects keep outward faces
+        if flip:
+            run = run[:, ::-1]
+
+        write_rows(file, "f" + (" " + token) * size + "\n", run)
+
+
+def write_obj(filepath, objects, depsgraph, global_matrix, options,
+              mesh_reader=read_mesh):
+    """Write objects to an OBJ file, return {material name: material}"""
+    use_materials = options.get("use_materials", True)
+    use_edges = options.get("use_edges", True)
+    used_materials = {}
+    materials = {}
+    offsets = np.ones(3, dtype=np.int64)
+
+    with open(filepath, 'w', encoding='utf-8', newline='\n',
+              buffering=1 << 20) as file:
+        file.write("# Blender Export Toolset OBJ File\n")
+
+        if use_materials:
+            mtl_name = path.splitext(path.basename(filepath))[0] + ".mtl"
+            file.write("mtllib %s\n" % mtl_name)
+
+        for ob in objects:
+            if ob.type not in mesh_types:
+                continue
+
+            data = mesh_reader(ob, depsgraph, options)
+
+            if data is None or not len(data.positions):
+                continue
+
+            matrix = np.array(global_matrix @ ob.matrix_world,
+                              dtype=np.float64)
+            rotation = matrix[:3, :3]
+
+            if options.get("use_blen_objects", True) or \
+                    options.get("group_by_object", False):
+                data_name = ob.data.name if ob.data else None
+                name = name_compat(ob.name)
+
+                if data_name is not None and data_name != ob.name:
+                    name += "_" + name_compat(data_name)
+
+                file.write("%s %s\n" % (
+                    "g" if options.get("group_by_object") else "o", name))
+
+            positions = data.positions @ rotation.T + matrix[:3, 3]
+            write_rows(file, "v %.6f %.6f %.6f\n", positions)
+
+            columns = [data.loop_vertices[data.face_loops] + offsets[0]]
+            token = "%d"
+
+            if data.loop_uvs is not None:
+                uvs, uv_index = np.unique(np.round(data.loop_uvs, 6),
+                                          axis=0, return_inverse=True)
+                write_rows(file, "vt %.6f %.6f\n", uvs)
+                columns.append(uv_index.ravel()[data.face_loops] + offsets[1])
+                token += "/%d"
+
+            if data.loop_normals is not None:
+                normals = data.loop_normals @ np.linalg.inv(rotation)
+                lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+                lengths[lengths == 0.0] = 1.0
+                normals, normal_index = np.unique(
+                    np.round(normals / lengths, 4), axis=0,
+                    return_inverse=True)
+                write_rows(file, "vn %.4f %.4f %.4f\n", normals)
+                columns.append(
+                    normal_index.ravel()[data.face_loops] + offsets[2])
+                token += "/%d" if data.loop_uvs is not None else "//%d"
+
+            material_names = []
+
+            for slot in ob.material_slots:
+                material = slot.material
+                material_names.append(
+                    None if material is None else name_compat(material.name))
+
+                if material is not None:
+                    materials[name_compat(material.name)] = material
+
+            corners = np.stack(columns, axis=1)
+            write_faces(file, corners, token, data, material_names,
+                        used_materials, use_materials,
+                        np.linalg.det(rotation) < 0.0)
+
+            if use_edges and len(data.loose_edges):
+                write_rows(file, "l %d %d\n", data.loose_edges + offsets[0])
+
+            offsets[0] += len(data.positions)
+
+            if data.loop_uvs is not None:
+                offsets[1] += len(uvs)
+            if data.loop_normals is not None:
+                offsets[2] += len(normals)
+
+    return {name: materials[name] for name in used_materials}
+
+
+def write_mtl(filepath, materials, path_mode='AUTO'):
+    """Write base color, roughness, alpha and color texture of materials"""
+    source_dir = path.dirname(bpy.data.filepath)
+    dest_dir = path.dirname(filepath)
+    copy_set = set()
+
+    with open(filepath, 'w', encoding='utf-8', newline='\n') as file:
+        file.write("# Blender Export Toolset MTL File\n")
+        file.write("# Material Count: %d\n" % len(materials))
+
+        for name, material in materials.items():
+            wrapper = node_shader_utils.PrincipledBSDFWrapper(
+                material, is_readonly=True)
+            specular = (1.0 - wrapper.roughness) * 30.0
+
+            file.write("\nnewmtl %s\n" % name)
+            file.write("Ns %.6f\n" % (specular * specular))
+            file.write("Kd %.6f %.6f %.6f\n" % tuple(wrapper.base_color[:3]))
+            file.write("Ks %.6f %.6f %.6f\n" % ((wrapper.specular,) * 3))
+            file.write("d %.6f\n" % wrapper.alpha)
+            file.write("illum 2\n")
+
+            texture = wrapper.base_color_texture
+
+            if texture is not None and texture.image is not None:
+                image = texture.image
+                image_path = io_utils.path_reference(
+                    image.filepath, source_dir, dest_dir, path_mode, "",
+                    copy_set, image.library)
+                file.write("map_Kd %s\n" % image_path)
+
+    io_utils.path_reference_copy(copy_set)
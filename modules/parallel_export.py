@@ -0,0 +1,123 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import json
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from os import path
+
+import bpy
+
+from .batch_worker import RESULT_PREFIX
+
+worker_script = path.join(path.dirname(path.abspath(__file__)),
+                          "batch_worker.py")
+addon_dir = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+class ParallelExport:
+    def __init__(self, jobs, workers, use_blend=True):
+        self.jobs = jobs
+        self.use_blend = use_blend
+        self.workers = workers
+        self.results = queue.Queue()
+        self.processes = []
+        self.threads = []
+        self.temp_dir = tempfile.mkdtemp(prefix="export_toolset_")
+        self.blend_path = path.join(self.temp_dir, "scene.blend")
+
+    def shards(self):
+        count = max(1, min(self.workers, len(self.jobs)))
+        return [self.jobs[i::count] for i in range(count)]
+
+    def start(self):
+        # Objects with several export targets have several jobs,
+        # results are matched to jobs by index
+        for i, job in enumerate(self.jobs):
+            job["index"] = i
+
+        for i, shard in enumerate(self.shards()):
+            jobs_path = path.join(self.temp_dir, "shard_%d.json" % i)
+
+            with open(jobs_path, 'w') as file:
+                json.dump(shard, file)
+
+            # Jobs without a saved scene bring their data in libraries
+            if self.use_blend:
+                args = [bpy.app.binary_path, "-b", self.blend_path]
+            else:
+                args = [bpy.app.binary_path, "-b", "--factory-startup"]
+
+            process = subprocess.Popen(
+                args + ["--python", worker_script, "--", addon_dir, jobs_path],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                universal_newlines=True)
+
+            thread = threading.Thread(
+                target=self.read_results, args=(process, shard), daemon=True)
+            thread.start()
+
+            self.processes.append(process)
+            self.threads.append(thread)
+
+    def read_results(self, process, shard):
+        reported = set()
+
+        for line in process.stdout:
+            if line.startswith(RESULT_PREFIX):
+                result = json.loads(line[len(RESULT_PREFIX):])
+                reported.add(result["index"])
+                self.results.put(result)
+
+        process.wait()
+
+        # Worker crashed or was cancelled before finishing its shard
+        for job in shard:
+            if job["index"] not in reported:
+                self.results.put({
+                    "name": job["name"], "index": job["index"],
+                    "status": "error",
+                    "message": "Worker exited with code %s"
+                    % process.returncode})
+
+    def poll(self):
+        results = []
+
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def is_running(self):
+        return (any(thread.is_alive() for thread in self.threads) or
+                not self.results.empty())
+
+    def cancel(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
+
+    def cleanup(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
@@ -0,0 +1,132 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import json
+import time
+from array import array
+from contextlib import contextmanager
+from functools import wraps
+from os import path
+
+
+def count_triangles(objects):
+    triangles = 0
+
+    for ob in objects:
+        if ob.type != 'MESH':
+            continue
+
+        polygons = ob.data.polygons
+        loop_totals = array('i', [0]) * len(polygons)
+        polygons.foreach_get('loop_total', loop_totals)
+        triangles += sum(loop_totals) - 2 * len(polygons)
+
+    return triangles
+
+
+class Profiler:
+    """Wall and CPU time of export pipeline stages"""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.events = []
+        self.outputs = []
+
+    def clear(self):
+        self.origin = time.perf_counter()
+        self.events.clear()
+        self.outputs.clear()
+
+    @contextmanager
+    def stage(self, name, target=""):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+        finally:
+            self.events.append((
+                name, target, start - self.origin,
+                time.perf_counter() - start,
+                time.process_time() - cpu_start))
+
+    def record_output(self, target, filepath, objects, size=None):
+        if not self.enabled:
+            return
+
+        if size is None:
+            try:
+                size = path.getsize(filepath)
+            except OSError:
+                size = 0
+
+        self.outputs.append({
+            "target": target,
+            "file": str(filepath),
+            "size": size,
+            "triangles": count_triangles(objects)})
+
+    def summary(self):
+        """Return (stage, count, wall seconds, cpu seconds), slowest first"""
+        stages = {}
+
+        for name, _, _, wall, cpu in self.events:
+            count, total_wall, total_cpu = stages.get(name, (0, 0.0, 0.0))
+            stages[name] = (count + 1, total_wall + wall, total_cpu + cpu)
+
+        return sorted(((name,) + values for name, values in stages.items()),
+                      key=lambda item: item[2], reverse=True)
+
+    def write_trace(self, filepath):
+        """Write events in Chrome trace format (chrome://tracing)"""
+        events = []
+
+        for name, target, start, wall, cpu in self.events:
+            events.append({
+                "name": name, "cat": "export", "ph": "X",
+                "ts": round(start * 1e6), "dur": round(wall * 1e6),
+                "pid": 1, "tid": 1,
+                "args": {"target": target, "cpu_ms": round(cpu * 1e3, 3)}})
+
+        with open(filepath, 'w') as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "outputs": self.outputs}, file, indent=1)
+
+
+profiler = Profiler()
+
+
+def profiled(name):
+    """Record every call of the decorated function as a profiler stage"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,174 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from .layer_index import get_layer_index
+from .profiler import profiled
+
+
+def get_collection_objects(collection):
+    objects = set(collection.objects)
+
+    for col in collection.children:
+        objects.update(get_collection_objects(col))
+
+    return objects
+
+
+class SceneState:
+    """Visibility, selection and collection exclusion of a view layer.
+
+    Captured once for the whole view layer, changed only where the next
+    export differs from the current state and restored in a single pass.
+    """
+
+    @profiled("snapshot")
+    def __init__(self, view_layer):
+        objects = view_layer.objects
+        count = len(objects)
+
+        self.view_layer = view_layer
+        self.active = objects.active
+        self.objects = objects[:]
+
+        self.hide_select = [False] * count
+        self.hide_viewport = [False] * count
+        objects.foreach_get('hide_select', self.hide_select)
+        objects.foreach_get('hide_viewport', self.hide_viewport)
+        self.hidden = [ob.hide_get() for ob in self.objects]
+        self.selected = [ob.select_get() for ob in self.objects]
+
+        self.index = {ob.as_pointer(): i for i, ob in enumerate(self.objects)}
+        self.initial = {ob.as_pointer(): ob for i, ob in enumerate(self.objects)
+                        if self.selected[i]}
+        self.current = dict(self.initial)
+
+        self.layer_collections = get_layer_index(view_layer)
+
+        # Original values of everything changed so far, keyed by pointer
+        self.touched_objects = {}
+        self.touched_layers = {}
+        self.touched_collections = {}
+
+    def remember_object(self, ob):
+        pointer = ob.as_pointer()
+
+        if pointer not in self.touched_objects:
+            i = self.index.get(pointer)
+
+            # Object appeared after its collection was included
+            if i is None:
+                state = (ob.hide_select, ob.hide_get(), ob.hide_viewport,
+                         ob.select_get())
+            else:
+                state = (self.hide_select[i], self.hidden[i],
+                         self.hide_viewport[i], self.selected[i])
+
+            self.touched_objects[pointer] = (ob,) + state
+
+        return self.touched_objects[pointer]
+
+    def prepare_object(self, ob):
+        _, hide_select, hidden, hide_viewport, _ = self.remember_object(ob)
+
+        if hide_select:
+            ob.hide_select = False
+        if hidden:
+            ob.hide_set(False)
+        if hide_viewport:
+            ob.hide_viewport = False
+
+    @profiled("prepare")
+    def prepare_collection(self, collection):
+        """Make a collection and its children exportable, return its objects"""
+        return self.prepare_collection_tree(collection)
+
+    def prepare_collection_tree(self, collection):
+        pointer = collection.as_pointer()
+        layer_collection = self.layer_collections.get(pointer)
+
+        if layer_collection is not None and pointer not in self.touched_layers:
+            self.touched_layers[pointer] = (
+                layer_collection, layer_collection.exclude,
+                layer_collection.hide_viewport)
+            layer_collection.exclude = False
+            layer_collection.hide_viewport = False
+
+        if pointer not in self.touched_collections:
+            self.touched_collections[pointer] = (
+                collection, collection.hide_select, collection.hide_viewport)
+            collection.hide_select = False
+            collection.hide_viewport = False
+
+        objects = []
+
+        for col in collection.children:
+            objects.extend(self.prepare_collection_tree(col))
+
+        objects.extend(collection.objects)
+
+        return objects
+
+    @profiled("select")
+    def select(self, objects, active=None):
+        """Select exactly the given objects, touching only what differs"""
+        wanted = {ob.as_pointer(): ob for ob in objects}
+
+        for pointer, ob in self.current.items():
+            if pointer not in wanted:
+                self.remember_object(ob)
+                ob.select_set(False)
+
+        for pointer, ob in wanted.items():
+            if pointer not in self.current:
+                self.prepare_object(ob)
+                ob.select_set(True)
+
+        self.current = wanted
+
+        if active is not None:
+            self.view_layer.objects.active = active
+
+    @profiled("restore")
+    def restore(self):
+        # Objects first, while included collections still expose them
+        for ob, hide_select, hidden, hide_viewport, selected in \
+                self.touched_objects.values():
+            ob.hide_select = hide_select
+            ob.hide_set(hidden)
+            ob.hide_viewport = hide_viewport
+            ob.select_set(selected)
+
+        self.view_layer.objects.active = self.active
+
+        for layer_collection, exclude, hide_viewport in \
+                self.touched_layers.values():
+            layer_collection.exclude = exclude
+            layer_collection.hide_viewport = hide_viewport
+
+        for collection, hide_select, hide_viewport in \
+                self.touched_collections.values():
+            collection.hide_select = hide_select
+            collection.hide_viewport = hide_viewport
+
+        self.current = dict(self.initial)
+        self.touched_objects.clear()
+        self.touched_layers.clear()
+        self.touched_collections.clear()
@@ -0,0 +1,141 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import os
+from os import path
+
+import bpy
+
+
+def create_shard_jobs(collection, temp_dir, targets):
+    """Write every child collection to its own library, one job per shard.
+
+    Each job exports its shard to every (properties, directory, format,
+    preset) target after a single library append.
+    """
+    targets = [{"directory": directory,
+                "preset": export_preset,
+                "format": export_format}
+               for _, directory, export_format, export_preset in targets]
+
+    shards = [(child.name, {child}, [child.name], [])
+              for child in collection.children]
+
+    # Objects directly inside the collection form one more shard
+    if len(collection.objects) > 0:
+        shards.append((collection.name, set(collection.objects), [],
+                       [ob.name for ob in collection.objects]))
+
+    jobs = []
+
+    for i, (shard_name, datablocks, collections, objects) in enumerate(shards):
+        library = path.join(temp_dir, "shard_%d.blend" % i)
+        bpy.data.libraries.write(library, datablocks, fake_user=True)
+
+        jobs.append({
+            "kind": "library",
+            "name": collection.name + "_" + shard_name,
+            "library": library,
+            "collections": collections,
+            "objects": objects,
+            "targets": targets})
+
+    return jobs
+
+
+def offset_indices(line, offsets):
+    parts = line.split()
+
+    for i, token in enumerate(parts[1:], 1):
+        indices = token.split('/')
+
+        for k, index in enumerate(indices):
+            # Negative indices are relative and stay valid
+            if index and int(index) > 0:
+                indices[k] = str(int(index) + offsets[k])
+
+        parts[i] = '/'.join(indices)
+
+    return ' '.join(parts) + '\n'
+
+
+def read_materials(mtl_path, materials):
+    name = None
+
+    with open(mtl_path, 'r') as file:
+        for line in file:
+            if line.startswith("newmtl "):
+                name = line[7:].strip()
+
+                if name in materials:
+                    name = None
+                    continue
+
+                materials[name] = []
+
+            if name is not None:
+                materials[name].append(line)
+
+
+def merge_obj(paths, merged_path):
+    """Concatenate OBJ files, offsetting vertex, uv and normal indices"""
+    offsets = [0, 0, 0]
+    materials = {}
+    mtl_path = path.splitext(merged_path)[0] + ".mtl"
+
+    with open(merged_path + ".tmp", 'w') as out:
+        for obj_path in paths:
+            counts = [0, 0, 0]
+
+            with open(obj_path, 'r') as file:
+                for line in file:
+                    if line.startswith("v "):
+                        counts[0] += 1
+                    elif line.startswith("vt "):
+                        counts[1] += 1
+                    elif line.startswith("vn "):
+                        counts[2] += 1
+                    elif line.startswith(("f ", "l ")):
+                        line = offset_indices(line, offsets)
+                    elif line.startswith("mtllib "):
+                        read_materials(path.join(path.dirname(obj_path),
+                                                 line[7:].strip()), materials)
+                        continue
+
+                    out.write(line)
+
+            offsets = [a + b for a, b in zip(offsets, counts)]
+
+    with open(merged_path, 'w') as out:
+        if materials:
+            out.write("mtllib %s\n" % path.basename(mtl_path))
+
+        with open(merged_path + ".tmp", 'r') as file:
+            for line in file:
+                out.write(line)
+
+    os.remove(merged_path + ".tmp")
+
+    if materials:
+        with open(mtl_path, 'w') as out:
+            for lines in materials.values():
+                out.writelines(lines)
+                out.write('\n')
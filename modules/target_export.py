@@ -0,0 +1,124 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from os import path
+
+from ..export_preset import export_scene, get_export_path, get_preset_hash
+from .build_manifest import record_output
+from .fingerprint import (is_up_to_date, load_manifest, objects_data_hash,
+                          objects_fingerprint, record_fingerprint)
+
+# Targets are (properties, directory, format, preset) as returned by
+# export_preset.get_export_targets, properties may be None
+
+
+def get_target_fingerprints(objects, targets, data_hash=None):
+    if data_hash is None:
+        data_hash = objects_data_hash(objects)
+
+    return [objects_fingerprint(objects, export_preset, export_format,
+                                data_hash)
+            for _, _, export_format, export_preset in targets]
+
+
+def get_pending_targets(objects, targets, file_name, manifests=None,
+                        use_fingerprints=False, data_hash=None):
+    """Return [(target, fingerprint)] of targets that need an export.
+
+    With Skip Unchanged manifests, a dict of per folder manifests loaded
+    on demand, up to date targets are left out. Fingerprints are taken
+    only when needed, before any transform reset, from data_hash when
+    given.
+    """
+    fingerprints = [None] * len(targets)
+
+    if manifests is not None or use_fingerprints:
+        fingerprints = get_target_fingerprints(objects, targets, data_hash)
+
+    pending = list(zip(targets, fingerprints))
+
+    if manifests is None:
+        return pending
+
+    stale = []
+
+    for target, fingerprint in pending:
+        _, directory, export_format, _ = target
+
+        if directory not in manifests:
+            manifests[directory] = load_manifest(directory)
+
+        if not is_up_to_date(manifests[directory], directory, file_name,
+                             export_format, fingerprint):
+            stale.append((target, fingerprint))
+
+    return stale
+
+
+def record_build(build_manifest, kind, name, target, fingerprint,
+                 members=None):
+    """Record an exported target in the build manifest next to the .blend"""
+    if build_manifest is None or fingerprint is None:
+        return
+
+    _, directory, export_format, export_preset = target
+    record_output(build_manifest, kind, name,
+                  get_export_path(directory, name, export_format),
+                  export_format, export_preset,
+                  get_preset_hash(export_format, export_preset), fingerprint,
+                  members)
+
+
+def export_targets(file_name, pending, manifests=None, build_manifest=None,
+                   kind='OBJECT', members=None, objects=None, report=None):
+    """Write every pending target from the current scene state.
+
+    Exporter messages are sent to report, usually the operator's.
+    Return [(target, error message or None)].
+    """
+    results = []
+
+    for target, fingerprint in pending:
+        _, directory, export_format, export_preset = target
+
+        if not path.exists(directory):
+            results.append((target, "Export Path Doesn't Exist!"))
+            continue
+
+        try:
+            export_scene(directory, file_name, export_preset, export_format,
+                         objects=objects, report=report)
+        except Exception as e:
+            results.append((target, str(e)))
+            continue
+
+        if manifests is not None and fingerprint is not None:
+            if directory not in manifests:
+                manifests[directory] = load_manifest(directory)
+
+            record_fingerprint(manifests[directory], file_name,
+                               export_format, fingerprint)
+
+        record_build(build_manifest, kind, file_name, target, fingerprint,
+                     members)
+        results.append((target, None))
+
+    return results
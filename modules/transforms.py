@@ -0,0 +1,137 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import numpy as np
+
+from .profiler import profiled
+
+# Local transform channels saved before a reset, with their sizes
+transform_channels = (("location", 3), ("rotation_euler", 3),
+                      ("rotation_quaternion", 4), ("rotation_axis_angle", 4),
+                      ("scale", 3))
+
+
+def read_props(objects, prop, width):
+    """Read a float vector property of all objects as (count, width) array"""
+    count = len(objects)
+    values = np.empty(count * width, dtype=np.float32)
+
+    if hasattr(objects, "foreach_get"):
+        objects.foreach_get(prop, values)
+    else:
+        for i, ob in enumerate(objects):
+            values[i * width:(i + 1) * width] = getattr(ob, prop)
+
+    return values.reshape(count, width)
+
+
+def write_props(objects, prop, values):
+    if hasattr(objects, "foreach_set"):
+        objects.foreach_set(prop, np.ascontiguousarray(
+            values, dtype=np.float32).ravel())
+    else:
+        for ob, value in zip(objects, values):
+            setattr(ob, prop, value.tolist())
+
+
+def read_matrices(objects, prop):
+    """Read a 4x4 matrix property of all objects as (count, 4, 4) array"""
+    if hasattr(objects, "foreach_get"):
+        # Blender stores matrices column by column
+        return read_props(objects, prop, 16).reshape(-1, 4, 4).transpose(
+            0, 2, 1)
+
+    return np.array([getattr(ob, prop) for ob in objects],
+                    dtype=np.float32).reshape(len(objects), 4, 4)
+
+
+class TransformReset:
+    """Move objects to the world origin and zero their rotation.
+
+    Works on the local transform channels directly, so it needs no 3D
+    Viewport context. Channels are saved as they are and written back
+    unchanged, by object pointer, independent of the selection order.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.object_list = list(objects)
+        self.pointers = [ob.as_pointer() for ob in self.object_list]
+        self.channels = [(prop, read_props(objects, prop, width))
+                         for prop, width in transform_channels]
+
+    @profiled("transform reset")
+    def apply(self, reset_pos, reset_rot, pivot='MEDIAN_POINT'):
+        if not self.object_list:
+            return
+
+        if reset_pos:
+            self.move_to_origin(pivot)
+
+        if reset_rot:
+            write_props(self.objects, 'rotation_euler',
+                        np.zeros((len(self.object_list), 3)))
+
+    def move_to_origin(self, pivot):
+        world = read_matrices(self.objects, 'matrix_world').astype(np.float64)
+        translations = world[:, :3, 3]
+
+        if pivot == 'BOUNDING_BOX_CENTER':
+            center = (translations.min(axis=0) +
+                      translations.max(axis=0)) / 2.0
+        else:
+            center = translations.mean(axis=0)
+
+        moved = set(self.pointers)
+        location = dict(self.channels)["location"].astype(np.float64)
+
+        for i, ob in enumerate(self.object_list):
+            parent = ob.parent
+
+            # Children of moved objects follow their parent
+            while parent is not None and parent.as_pointer() not in moved:
+                parent = parent.parent
+
+            if parent is not None:
+                continue
+
+            offset = -center
+
+            if ob.parent is not None:
+                parent_space = (np.array(ob.parent.matrix_world) @
+                                np.array(ob.matrix_parent_inverse))
+                offset = np.linalg.inv(parent_space[:3, :3]) @ offset
+
+            location[i] += offset
+
+        write_props(self.objects, 'location', location)
+
+    @profiled("transform restore")
+    def restore(self):
+        if not self.object_list:
+            return
+
+        current = [ob.as_pointer() for ob in self.objects]
+        objects = self.objects if current == self.pointers else \
+            self.object_list
+
+        for prop, values in self.channels:
+            write_props(objects, prop, values)
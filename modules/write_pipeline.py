@@ -0,0 +1,207 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+import gzip
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+compression_suffixes = {"GZIP": ".gz", "ZSTD": ".zst"}
+
+# Exports are written as "<name>.staging.<ext>" next to their final file
+STAGING_SUFFIX = ".staging"
+
+# Only text formats are worth compressing, FBX is already packed binary
+compressible_exts = (".obj", ".mtl")
+
+# Exports are finalized one at a time, in submission order
+executor = ThreadPoolExecutor(max_workers=1,
+                              thread_name_prefix="export_toolset_writer")
+pending_writes = []
+
+# Sizes of finalized files: {file, size, compressed_size, ratio, seconds}
+write_log = []
+
+
+def get_compression(compression):
+    """Return compression actually available for the requested one"""
+    if compression == "ZSTD" and zstandard is None:
+        return "GZIP"
+
+    return compression
+
+
+def get_output_suffix(export_format, compression):
+    if "." + export_format not in compressible_exts:
+        return ""
+
+    return compression_suffixes.get(get_compression(compression), "")
+
+
+def get_staging_name(file_name):
+    """Exporters write into the export folder under this name, so texture
+    paths (path_mode 'AUTO' and 'RELATIVE') resolve against the final
+    folder and not a temporary one"""
+    return file_name + STAGING_SUFFIX
+
+
+def get_staged_files(directory, staging_name):
+    return [name for name in sorted(os.listdir(directory))
+            if name.startswith(staging_name + ".")]
+
+
+def rename_mtllib(lines, staging_name, file_name):
+    """OBJ files reference their .mtl by file name, point it at the final
+    one"""
+    old = staging_name.encode('utf-8')
+    new = file_name.encode('utf-8')
+
+    for line in lines:
+        if line.startswith(b"mtllib "):
+            line = line.replace(old, new)
+
+        yield line
+
+
+def write_stream(lines, dest_file, compression):
+    if compression == "ZSTD":
+        compressor = zstandard.ZstdCompressor()
+
+        with compressor.stream_writer(dest_file) as writer:
+            writer.writelines(lines)
+    elif compression == "GZIP":
+        # Fixed mtime and no file name keep output reproducible
+        with gzip.GzipFile(filename="", mode='wb', fileobj=dest_file,
+                           mtime=0) as gzip_file:
+            gzip_file.writelines(lines)
+    else:
+        dest_file.writelines(lines)
+
+
+def move_into_place(src, dest, compression="NONE", rename=None):
+    """Rename src over dest, or write it next to dest as .partial when it
+    is compressed or rewritten, so a reader never sees a half written file.
+
+    rename is (staging name, file name) for OBJ files.
+    """
+    if compression == "NONE" and rename is None:
+        os.replace(src, dest)
+        return
+
+    partial = dest + ".partial"
+
+    try:
+        with open(src, 'rb') as src_file, open(partial, 'wb') as dest_file:
+            lines = src_file
+
+            if rename is not None:
+                lines = rename_mtllib(src_file, *rename)
+
+            write_stream(lines, dest_file, compression)
+
+        os.replace(partial, dest)
+    except BaseException:
+        if path.exists(partial):
+            os.remove(partial)
+        raise
+
+    os.remove(src)
+
+
+def finalize(directory, staging_name, file_name, compression):
+    try:
+        for name in get_staged_files(directory, staging_name):
+            src = path.join(directory, name)
+            ext = path.splitext(name)[1].lower()
+            start = time.perf_counter()
+            file_compression = "NONE"
+
+            if ext in compressible_exts:
+                file_compression = get_compression(compression)
+
+            dest = path.join(
+                directory, file_name + name[len(staging_name):] +
+                compression_suffixes.get(file_compression, ""))
+            size = path.getsize(src)
+            move_into_place(src, dest, file_compression,
+                            (staging_name, file_name) if ext == ".obj"
+                            else None)
+
+            compressed_size = path.getsize(dest)
+            write_log.append({
+                "file": dest,
+                "size": size,
+                "compressed_size": compressed_size,
+                "ratio": compressed_size / size if size else 1.0,
+                "seconds": time.perf_counter() - start})
+    finally:
+        discard_staged_files(directory, staging_name)
+
+
+def discard_staged_files(directory, staging_name):
+    for name in get_staged_files(directory, staging_name):
+        try:
+            os.remove(path.join(directory, name))
+        except OSError:
+            pass
+
+
+def submit(directory, staging_name, file_name, compression="NONE"):
+    """Move a finished export into place on the writer thread.
+
+    Futures are kept until wait_for_writes collects their errors.
+    """
+    future = executor.submit(finalize, directory, staging_name, file_name,
+                             compression)
+    pending_writes.append(future)
+    return future
+
+
+def wait_for_writes():
+    """Block until all submitted exports are in place,
+    return error messages of failed ones"""
+    errors = []
+
+    for future in pending_writes:
+        try:
+            future.result()
+        except Exception as e:
+            errors.append(str(e))
+
+    pending_writes.clear()
+    return errors
+
+
+def get_write_totals():
+    """Return (file count, size, compressed size) of finalized files"""
+    size = sum(entry["size"] for entry in write_log)
+    compressed_size = sum(entry["compressed_size"] for entry in write_log)
+    return len(write_log), size, compressed_size
+
+
+def clear_write_log():
+    write_log.clear()
@@ -19,69 +19,89 @@
 # <pep8 compliant>
 
 
-import json
-from os import path
+import os
+from os import cpu_count, path
 
 import bpy
-from bpy.props import EnumProperty
+from bpy.props import EnumProperty, StringProperty
 from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper
 
-from .export_preset import export_scene
+from .export_preset import (find_preset_errors, get_export_path,
+                            get_export_targets, reload_presets)
+from .modules.build_manifest import (find_orphaned_outputs,
+                                     get_build_sources, get_kept_outputs,
+                                     is_output_current, load_build_manifest,
+                                     save_build_manifest)
+from .modules.export_planner import build_export_plan
+from .modules.export_queue import export_queue, run_job
+from .modules.fingerprint import instances_data_hash, save_manifest
+from .modules.layer_index import get_layer_collection
+from .modules.linked_data import formats as linked_data_formats
+from .modules.linked_data import (finish_writer, group_instances,
+                                  write_linked_data)
+from .modules.parallel_export import ParallelExport
+from .modules.profiler import profiler
+from .modules.scene_state import SceneState, get_collection_objects
+from .modules.sharded_export import create_shard_jobs, merge_obj
+from .modules.target_export import (export_targets, get_pending_targets,
+                                    record_build)
+from .modules.transforms import TransformReset
+from .modules.write_pipeline import (clear_write_log, get_write_totals,
+                                     wait_for_writes)
 
 
-class ExportObject:
-    def __init__(self, ob):
-        self.ob = ob
-        self.hide_select = ob.hide_select
-        self.hide_set = ob.hide_get()
-        self.hide_viewport = ob.hide_viewport
-        self.select_set = ob.select_get()
+def report_orphaned_outputs(operator, build_manifest, expected_files):
+    orphaned = find_orphaned_outputs(build_manifest, expected_files)
 
-    def restore(self):
-        self.ob.hide_select = self.hide_select
-        self.ob.hide_set(self.hide_set)
-        self.ob.hide_viewport = self.hide_viewport
-        self.ob.select_set(self.select_set)
+    for filepath in orphaned:
+        print("Export Toolset: orphaned output", filepath)
 
-    def prepare(self):
-        self.ob.hide_select = False
-        self.ob.hide_set(False)
-        self.ob.hide_viewport = False
-        self.ob.select_set(True)
+    if orphaned:
+        operator.report({'WARNING'}, "%d orphaned files, see console" %
+                        len(orphaned))
 
+    return len(orphaned)
 
-class ExportCollection:
-    def __init__(self, col):
-        self.col = col
-        self.layer_collection = self.get_view_layer_collection(
-            bpy.context.view_layer.layer_collection, self.col)
-        self.l_exclude = self.layer_collection.exclude
-        self.l_hide_viewport = self.layer_collection.hide_viewport
-        self.hide_select = self.col.hide_select
-        self.hide_viewport = self.col.hide_viewport
 
-    def restore(self):
-        self.layer_collection.exclude = self.l_exclude
-        self.layer_collection.hide_viewport = self.l_hide_viewport
-        self.col.hide_select = self.hide_select
-        self.col.hide_viewport = self.hide_viewport
+def get_active_export_properties(context):
+    if len(context.selected_objects) == 0:
+        if context.collection is not None:
+            return context.collection.export_properties
+    elif context.active_object is not None:
+        return context.active_object.export_properties
 
-    def prepare(self):
-        self.layer_collection.exclude = False
-        self.layer_collection.hide_viewport = False
-        self.col.hide_select = False
-        self.col.hide_viewport = False
+    return None
 
-    def get_view_layer_collection(self, layer_collection, collection):
-        if layer_collection.collection == collection:
-            return layer_collection
 
-        for child_layer in layer_collection.children:
-            view_layer_collection = self.get_view_layer_collection(
-                child_layer, collection)
+def start_export_queue():
+    if not export_queue.running:
+        bpy.ops.export_toolset.process_export_queue()
 
-            if view_layer_collection is not None:
-                return view_layer_collection
+
+def tag_redraw(context):
+    for area in context.screen.areas:
+        if area.type == 'VIEW_3D':
+            area.tag_redraw()
+
+
+def report_writes(operator, context):
+    """Wait for exports still being moved into place and report them"""
+    errors = wait_for_writes()
+
+    for error in errors:
+        operator.report({'ERROR'}, "Failed to write export: " + error)
+
+    if context.scene.ET_compression != 'NONE':
+        count, size, compressed_size = get_write_totals()
+
+        if size:
+            operator.report({'INFO'}, "%d files compressed to %.1f%%" %
+                            (count, 100.0 * compressed_size / size))
+
+        clear_write_log()
+
+    return len(errors)
 
 
 class ET_OT_export_single(Operator):
@@ -124,55 +144,85 @@ class ET_OT_export_single(Operator):
 
         if path.exists(directory):
             scene = context.scene
+            targets = get_export_targets(export_properties)
+            build_manifest = load_build_manifest()
 
-            if scene.ET_reset_pos is True:
-                bpy.ops.view3d.snap_cursor_to_selected()
-                c_loс = scene.cursor.location.copy()
-                bpy.ops.view3d.snap_cursor_to_center()
-                bpy.ops.view3d.snap_selected_to_cursor(use_offset=True)
+            build_kind = export_mode
+            members = None
 
-            if scene.ET_reset_rot is True:
-                rots = []
-                for ob in context.selected_objects:
-                    rots.append(ob.rotation_euler.copy())
-                    ob.rotation_euler.zero()
+            if export_mode == 'OBJECT':
+                objects = selected_objects
 
-            export_format = export_properties.format.lower()
-
-            if export_format == "fbx":
-                export_preset = export_properties.fbx_preset
-            elif export_format == "obj":
-                export_preset = export_properties.obj_preset
+                if len(selected_objects) > 1:
+                    build_kind = 'SELECTION'
+                    members = [ob.name for ob in selected_objects]
+            else:
+                objects = get_collection_objects(active_collection)
+
+            # Fingerprint before transforms are reset
+            manifests = {} if scene.ET_skip_unchanged is True else None
+            pending = get_pending_targets(
+                objects, targets, file_name, manifests,
+                use_fingerprints=build_manifest is not None)
+
+            if not pending:
+                self.report({'INFO'}, "Export Skipped, Nothing Changed")
+                return {'FINISHED'}
+
+            if scene.ET_use_queue is True:
+                if export_mode == 'OBJECT':
+                    export_queue.push('SELECTION', file_name,
+                                      selected_objects, pending, reset=True)
+                else:
+                    export_queue.push('COLLECTION', file_name,
+                                      [active_collection], pending)
+
+                start_export_queue()
+                self.report({'INFO'}, "Export Queued")
+                return {'FINISHED'}
+
+            reset = None
+
+            if scene.ET_reset_pos is True or scene.ET_reset_rot is True:
+                reset = TransformReset(context.view_layer.objects.selected)
+                reset.apply(scene.ET_reset_pos, scene.ET_reset_rot,
+                            scene.tool_settings.transform_pivot_point)
+                context.view_layer.update()
 
             use_collection = False if export_mode == 'OBJECT' else True
+            state = SceneState(context.view_layer)
 
             # Select all objects inside collections
-            self.export_objects = []
-            self.export_cols = []
-
             if use_collection:
-                self.select_objects(active_collection)
+                state.select(state.prepare_collection(active_collection))
+
+            # Export every target from the same prepared scene
+            results = export_targets(file_name, pending, manifests,
+                                     build_manifest, build_kind, members,
+                                     report=self.report)
+            result = "Nothing Exported"
 
-            # Export
-            result = export_scene(
-                directory, file_name, export_preset, export_format)
+            for target, error in results:
+                if error is None:
+                    result = "Export Finished"
+                else:
+                    self.report({'ERROR'}, "%s (%s)" % (error, target[1]))
 
             # Restore objects restrictions
-            for ob in self.export_objects:
-                ob.restore()
+            state.restore()
 
-            for col in self.export_cols:
-                col.restore()
+            if reset is not None:
+                reset.restore()
 
-            if scene.ET_reset_pos is True:
-                scene.cursor.location = c_loс
-                bpy.ops.view3d.snap_selected_to_cursor(use_offset=True)
+            if manifests is not None:
+                for target_dir, manifest in manifests.items():
+                    save_manifest(target_dir, manifest)
 
-            if scene.ET_reset_rot is True:
-                i = 0
-                for ob in context.selected_objects:
-                    ob.rotation_euler = rots[i]
-                    i = i + 1
+            save_build_manifest(build_manifest)
+
+            # Files are only finished once the writer thread is done
+            if report_writes(self, context):
+                result = "Export Failed"
 
             self.report({'INFO'}, result)
             return {'FINISHED'}
@@ -180,20 +230,6 @@ class ET_OT_export_single(Operator):
             self.report({'ERROR'}, "Export Path Doesn't Exist!")
             return {'FINISHED'}
 
-    def select_objects(self, collection):
-        export_col = ExportCollection(collection)
-        self.export_cols.append(export_col)
-
-        for col in collection.children:
-            self.select_objects(col)
-
-        export_col.prepare()
-
-        for ob in collection.objects:
-            export_ob = ExportObject(ob)
-            self.export_objects.append(export_ob)
-            export_ob.prepare()
-
 
 class ET_OT_export_batch(Operator):
     """Export each selected object in a separate file"""
@@ -214,32 +250,701 @@ class ET_OT_export_batch(Operator):
         return False
 
     def execute(self, context):
+        scene = context.scene
         selected_objects = context.selected_objects
-        bpy.ops.object.select_all(action='DESELECT')
+        skip_unchanged = scene.ET_skip_unchanged
+        dedup_instances = scene.ET_dedup_instances
+        use_queue = scene.ET_use_queue and not dedup_instances
+        manifests = {}
+        build_manifest = load_build_manifest()
+        skipped = 0
+        writers = []
+        state = SceneState(context.view_layer)
+
+        # (object to export, file name, instances sharing its data)
+        if dedup_instances:
+            exports = [(group[0], name, group)
+                       for name, group in group_instances(selected_objects)]
+        else:
+            exports = [(obj, obj.name, None) for obj in selected_objects]
 
-        for obj in selected_objects:
-            obj.select_set(True)
-            context.view_layer.objects.active = obj
+        for obj, file_name, instances in exports:
+            state.select([obj], active=obj)
             export_properties = obj.export_properties
-            directory = export_properties.directory
 
-            if path.exists(directory):
-                export_format = export_properties.format.lower()
+            if not path.exists(export_properties.directory):
+                self.report({'ERROR'}, "Export Path Doesn't Exist!")
+                continue
 
-                if export_format == "fbx":
-                    export_preset = export_properties.fbx_preset
-                elif export_format == "obj":
-                    export_preset = export_properties.obj_preset
+            targets = get_export_targets(export_properties)
+            data_hash = None
 
-                result = export_scene(
-                    directory, obj.name, export_preset, export_format)
+            # Placements change with the transform of every instance
+            if instances is not None and (skip_unchanged or
+                                          build_manifest is not None):
+                data_hash = instances_data_hash(instances)
 
-                self.report({'INFO'}, result)
-            else:
-                self.report({'ERROR'}, "Export Path Doesn't Exist!")
+            pending = get_pending_targets(
+                [obj], targets, file_name,
+                manifests if skip_unchanged else None,
+                use_fingerprints=build_manifest is not None,
+                data_hash=data_hash)
+
+            if not pending:
+                skipped += 1
+                continue
+
+            if use_queue:
+                export_queue.push('SELECTION', file_name, [obj], pending)
+                continue
+
+            # Shared data is exported once at the origin
+            reset = None
+
+            if instances is not None:
+                reset = TransformReset([obj])
+                reset.apply(True, True)
+                context.view_layer.update()
+
+            results = export_targets(
+                file_name, pending, manifests if skip_unchanged else None,
+                build_manifest, report=self.report)
+
+            exported = []
+
+            for target, error in results:
+                if error is not None:
+                    self.report({'ERROR'}, "%s (%s)" % (error, target[1]))
+                    continue
 
-        for obj in selected_objects:
-            obj.select_set(True)
+                exported.append(target)
+                self.report({'INFO'}, "Export Finished")
+
+            # Placements are read from the restored transforms
+            if reset is not None:
+                reset.restore()
+                context.view_layer.update()
+
+            if instances is not None:
+                for target in exported:
+                    writers.append(self.write_placements(
+                        scene, target[1], file_name, instances))
+
+        for directory, manifest in manifests.items():
+            save_manifest(directory, manifest)
+
+        save_build_manifest(build_manifest)
+        state.restore()
+
+        if use_queue:
+            start_export_queue()
+        else:
+            report_writes(self, context)
+
+        for writer in writers:
+            error = finish_writer(writer)
+
+            if error is not None:
+                self.report({'ERROR'}, "Failed to write %s: %s" %
+                            (path.basename(writer.file_path), error))
+
+        if skipped:
+            self.report({'INFO'}, "%d unchanged objects skipped" % skipped)
+
+        if dedup_instances:
+            self.report({'INFO'}, "%d objects \u2192 %d unique meshes" %
+                        (len(selected_objects), len(exports)))
+
+        return {'FINISHED'}
+
+    def write_placements(self, scene, directory, file_name, instances):
+        data_format = scene.ET_linked_data_format
+        extension = linked_data_formats[data_format][0]
+        file_path = path.join(directory, file_name + "_placements" + extension)
+        return write_linked_data(file_path, instances, data_format,
+                                 compact=scene.ET_compact_json)
+
+
+class ET_OT_export_batch_parallel(Operator):
+    """Export each selected object in a separate file using background Blender processes"""
+    bl_idname = "export_toolset.export_batch_parallel"
+    bl_label = "Export Batch (Parallel)"
+
+    _timer = None
+
+    @classmethod
+    def poll(cls, context):
+        return ET_OT_export_batch.poll(context)
+
+    def execute(self, context):
+        self.failed = []
+        self.build_manifest = load_build_manifest()
+        self.engine = self.create_engine(context)
+
+        if self.engine is None:
+            return {'CANCELLED'}
+
+        self.engine.start()
+
+        self.total = len(self.engine.jobs)
+        self.done = 0
+
+        wm = context.window_manager
+        wm.progress_begin(0, self.total)
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def get_workers(self, context):
+        try:
+            prefs = context.preferences.addons[__package__].preferences
+            return prefs.batch_workers
+        except KeyError:
+            return cpu_count() or 1
+
+    def create_engine(self, context):
+        jobs = []
+        self.target_count = len(context.selected_objects)
+
+        for obj in context.selected_objects:
+            targets = get_export_targets(obj.export_properties)
+            self.target_count += len(targets) - 1
+            pending = get_pending_targets(
+                [obj], targets, obj.name,
+                use_fingerprints=self.build_manifest is not None)
+
+            for target, fingerprint in pending:
+                _, directory, export_format, export_preset = target
+
+                if not path.exists(directory):
+                    self.failed.append(
+                        (obj.name, "Export Path Doesn't Exist!"))
+                    continue
+
+                jobs.append({
+                    "name": obj.name,
+                    "directory": directory,
+                    "preset": export_preset,
+                    "format": export_format,
+                    "compression": context.scene.ET_compression,
+                    "backend": context.scene.ET_export_backend,
+                    "fingerprint": fingerprint})
+
+        if not jobs:
+            self.report({'ERROR'}, "Export Path Doesn't Exist!")
+            return None
+
+        # Workers load a copy of the current state of the scene
+        engine = ParallelExport(jobs, self.get_workers(context))
+        bpy.ops.wm.save_as_mainfile(filepath=engine.blend_path, copy=True)
+
+        return engine
+
+    def on_finished(self, context):
+        pass
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.engine.cancel()
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        for result in self.engine.poll():
+            self.done += 1
+
+            if result["status"] != "ok":
+                self.failed.append((result["name"], result["message"]))
+                continue
+
+            # Library shards are not fingerprinted
+            job = self.engine.jobs[result["index"]]
+
+            if "fingerprint" in job:
+                record_build(self.build_manifest, 'OBJECT', job["name"],
+                             (None, job["directory"], job["format"],
+                              job["preset"]), job["fingerprint"])
+
+        context.window_manager.progress_update(self.done)
+        context.workspace.status_text_set(
+            "%s: %d / %d (Esc to cancel)" %
+            (self.bl_label, self.done, self.total))
+
+        if self.engine.is_running():
+            return {'PASS_THROUGH'}
+
+        return self.finish(context)
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+        self.on_finished(context)
+        self.engine.cleanup()
+        save_build_manifest(self.build_manifest)
+
+        if self.failed:
+            for name, message in self.failed:
+                self.report({'ERROR'}, "Failed to export %s: %s" %
+                            (name, message))
+
+            self.report({'WARNING'}, "%d of %d exports failed" %
+                        (len(self.failed), self.target_count))
+        else:
+            self.report({'INFO'}, "Export Finished")
+
+        return {'FINISHED'}
+
+
+class ET_OT_export_collection_sharded(ET_OT_export_batch_parallel):
+    """Export each child collection of the active collection in a background Blender process"""
+    bl_idname = "export_toolset.export_collection_sharded"
+    bl_label = "Export Collection (Sharded)"
+
+    @classmethod
+    def poll(cls, context):
+        collection = context.collection
+
+        return (len(context.selected_objects) == 0 and
+                collection is not None and
+                collection.export_properties.directory != "" and
+                len(collection.children) > 0)
+
+    def create_engine(self, context):
+        collection = context.collection
+        export_properties = collection.export_properties
+        self.collection_name = collection.name
+        self.targets = [target for target in
+                        get_export_targets(export_properties)
+                        if path.exists(target[1])]
+
+        if not self.targets:
+            self.report({'ERROR'}, "Export Path Doesn't Exist!")
+            return None
+
+        engine = ParallelExport([], self.get_workers(context),
+                                use_blend=False)
+        engine.jobs = create_shard_jobs(collection, engine.temp_dir,
+                                        self.targets)
+        self.target_count = len(engine.jobs)
+
+        # Workers start from an empty scene without these settings
+        scene = context.scene
+
+        for job in engine.jobs:
+            job.update(reset_pos=scene.ET_reset_pos,
+                       reset_rot=scene.ET_reset_rot,
+                       pivot=scene.tool_settings.transform_pivot_point)
+
+        return engine
+
+    def on_finished(self, context):
+        if not context.scene.ET_merge_shards or self.failed:
+            return
+
+        obj_targets = [target for target in self.targets
+                       if target[2] == "obj"]
+
+        if len(obj_targets) < len(self.targets):
+            self.report({'WARNING'}, "Only OBJ shards can be merged")
+
+        for _, directory, _, _ in obj_targets:
+            # Shards are written uncompressed so they can be merged
+            paths = [str(get_export_path(directory, job["name"], "obj",
+                                         "NONE"))
+                     for job in self.engine.jobs]
+            merged_path = get_export_path(
+                directory, self.collection_name, "obj", "NONE")
+            merge_obj(paths, str(merged_path))
+
+            for obj_path in paths:
+                for shard_path in (obj_path,
+                                   path.splitext(obj_path)[0] + ".mtl"):
+                    if path.exists(shard_path):
+                        os.remove(shard_path)
+
+
+class ET_OT_export_child_collections(Operator):
+    """Export each child collection of the active collection in its own file"""
+    bl_idname = "export_toolset.export_child_collections"
+    bl_label = "Export Child Collections"
+
+    @classmethod
+    def poll(cls, context):
+        return ET_OT_export_collection_sharded.poll(context)
+
+    def invoke(self, context, event):
+        self.plan = build_export_plan(context.collection)
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+    def draw(self, context):
+        layout = self.layout
+        plan = getattr(self, "plan", None)
+
+        if plan is None:
+            plan = self.plan = build_export_plan(context.collection)
+
+        col = layout.column(align=True)
+        row = col.row()
+        row.label(text="File")
+        row.label(text="Objects")
+        row.label(text="Polygons")
+
+        for entry in plan:
+            row = col.row()
+            row.alert = not path.exists(entry.export_properties.directory)
+            row.label(text=entry.name + "." +
+                      entry.export_properties.format.lower())
+            row.label(text=str(len(entry.objects)))
+            row.label(text=str(entry.polygons))
+
+        shared = sum(entry.shared for entry in plan)
+
+        layout.label(text="%d files, %d objects, %d polygons" % (
+            len([entry for entry in plan if entry.objects]),
+            sum(len(entry.objects) for entry in plan),
+            sum(entry.polygons for entry in plan)))
+
+        if shared:
+            layout.label(text="%d shared objects exported once" % shared,
+                         icon='INFO')
+
+    def execute(self, context):
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        collection = context.collection
+        plan = build_export_plan(collection)
+        build_manifest = load_build_manifest()
+        exported = 0
+
+        # Visibility of the whole tree is changed once for all files
+        state = SceneState(context.view_layer)
+        state.prepare_collection(collection)
+
+        for entry in plan:
+            if not entry.objects:
+                continue
+
+            targets = get_export_targets(entry.export_properties)
+            pending = get_pending_targets(
+                entry.objects, targets, entry.name,
+                use_fingerprints=build_manifest is not None)
+
+            state.select(entry.objects)
+            results = export_targets(entry.name, pending,
+                                     build_manifest=build_manifest,
+                                     kind='PLAN',
+                                     objects=entry.objects,
+                                     report=self.report)
+
+            for target, error in results:
+                if error is None:
+                    exported += 1
+                else:
+                    self.report({'ERROR'}, "%s (%s)" % (error, entry.name))
+
+        state.restore()
+        save_build_manifest(build_manifest)
+
+        report_writes(self, context)
+        self.report({'INFO'}, "%d files exported" % exported)
+
+        return {'FINISHED'}
+
+
+class ET_OT_export_outdated(Operator):
+    """Export objects and collections whose files are missing or older than their data"""
+    bl_idname = "export_toolset.export_outdated"
+    bl_label = "Export Outdated"
+
+    @classmethod
+    def poll(cls, context):
+        return bpy.data.filepath != ""
+
+    def execute(self, context):
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        scene = context.scene
+        build_manifest = load_build_manifest()
+        kept_files = get_kept_outputs(build_manifest)
+        expected_files = set(kept_files)
+        state = SceneState(context.view_layer)
+        exported = 0
+        current = 0
+        kept = 0
+
+        view_layer = context.view_layer
+        outside = 0
+
+        try:
+            for kind, datablock, objects in get_build_sources(view_layer):
+                name = datablock.name
+                targets = get_export_targets(datablock.export_properties)
+
+                # Objects of collections outside the view layer can't be
+                # selected, their files are kept as they are
+                if (kind == 'COLLECTION' and
+                        get_layer_collection(view_layer, datablock) is None):
+                    for _, directory, export_format, _ in targets:
+                        expected_files.add(str(get_export_path(
+                            directory, name, export_format)))
+
+                    outside += 1
+                    continue
+
+                stale = []
+
+                for target, fingerprint in get_pending_targets(
+                        objects, targets, name, use_fingerprints=True):
+                    filepath = get_export_path(target[1], name, target[2])
+                    expected_files.add(str(filepath))
+
+                    # Never overwrite a file exported from several objects
+                    # or planned from a parent collection
+                    if str(filepath) in kept_files:
+                        kept += 1
+                    elif is_output_current(build_manifest, kind, name,
+                                           filepath, fingerprint):
+                        current += 1
+                    else:
+                        stale.append((target, fingerprint))
+
+                if not stale:
+                    continue
+
+                if kind == 'OBJECT':
+                    state.select(objects, active=datablock)
+                else:
+                    state.select(state.prepare_collection(datablock))
+
+                reset = None
+
+                if kind == 'OBJECT' and (scene.ET_reset_pos or
+                                         scene.ET_reset_rot):
+                    reset = TransformReset(objects)
+                    reset.apply(scene.ET_reset_pos, scene.ET_reset_rot,
+                                scene.tool_settings.transform_pivot_point)
+                    view_layer.update()
+
+                try:
+                    results = export_targets(name, stale,
+                                             build_manifest=build_manifest,
+                                             kind=kind, report=self.report)
+                finally:
+                    if reset is not None:
+                        reset.restore()
+
+                for target, error in results:
+                    if error is None:
+                        exported += 1
+                    else:
+                        self.report({'ERROR'}, "%s (%s)" % (error, name))
+        finally:
+            state.restore()
+            save_build_manifest(build_manifest)
+
+        report_writes(self, context)
+
+        self.report({'INFO'}, "%d files exported, %d up to date" %
+                    (exported, current))
+
+        if kept:
+            self.report({'INFO'}, "%d selection and child collection "
+                        "exports kept" % kept)
+
+        if outside:
+            self.report({'INFO'}, "%d collections outside the view layer "
+                        "skipped" % outside)
+
+        report_orphaned_outputs(self, build_manifest, expected_files)
+
+        return {'FINISHED'}
+
+
+class ET_OT_report_orphaned_outputs(Operator):
+    """List exported files whose object, collection or target no longer exists"""
+    bl_idname = "export_toolset.report_orphaned_outputs"
+    bl_label = "Report Orphaned Files"
+
+    @classmethod
+    def poll(cls, context):
+        return bpy.data.filepath != ""
+
+    def execute(self, context):
+        build_manifest = load_build_manifest()
+        expected_files = get_kept_outputs(build_manifest)
+
+        for _, datablock, _ in get_build_sources(context.view_layer):
+            name = datablock.name
+
+            for _, directory, export_format, _ in get_export_targets(
+                    datablock.export_properties):
+                expected_files.add(
+                    str(get_export_path(directory, name, export_format)))
+
+        if not report_orphaned_outputs(self, build_manifest,
+                                       expected_files):
+            self.report({'INFO'}, "No Orphaned Files")
+
+        return {'FINISHED'}
+
+
+class ET_OT_process_export_queue(Operator):
+    """Run queued exports one by one without blocking the interface"""
+    bl_idname = "export_toolset.process_export_queue"
+    bl_label = "Process Export Queue"
+    bl_options = {'INTERNAL'}
+
+    _timer = None
+
+    @classmethod
+    def poll(cls, context):
+        return not export_queue.running
+
+    def execute(self, context):
+        export_queue.running = True
+
+        # Written and restored once when the queue finishes
+        self.build_manifest = load_build_manifest()
+        self.state = SceneState(context.view_layer)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.05, window=context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if export_queue.cancelled or not export_queue.jobs:
+            return self.finish(context)
+
+        if export_queue.paused:
+            context.workspace.status_text_set(
+                "Export Queue Paused: %d / %d" %
+                (export_queue.done, export_queue.total))
+            return {'PASS_THROUGH'}
+
+        # One export per tick keeps the interface responsive
+        job = export_queue.pop()
+        error = run_job(context, job, self.build_manifest, self.report,
+                        self.state)
+        export_queue.done += 1
+
+        if error:
+            export_queue.failed.append((job.file_name, error))
+
+        context.workspace.status_text_set(
+            "Export Queue: %d / %d" % (export_queue.done, export_queue.total))
+        tag_redraw(context)
+
+        return {'PASS_THROUGH'}
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
+        self.state.restore()
+        save_build_manifest(self.build_manifest)
+
+        for error in wait_for_writes():
+            export_queue.failed.append(("", error))
+
+        if export_queue.failed:
+            for name, message in export_queue.failed:
+                print("Export Toolset: failed to export %s: %s" %
+                      (name, message))
+
+            self.report({'WARNING'}, "%d of %d exports failed" %
+                        (len(export_queue.failed), export_queue.total))
+        elif export_queue.cancelled:
+            self.report({'INFO'}, "Export Queue Cancelled")
+        else:
+            self.report({'INFO'}, "Export Finished")
+
+        export_queue.clear()
+        export_queue.running = False
+        tag_redraw(context)
+
+        return {'FINISHED'}
+
+
+class ET_OT_pause_export_queue(Operator):
+    """Pause or resume queued exports"""
+    bl_idname = "export_toolset.pause_export_queue"
+    bl_label = "Pause/Resume Export Queue"
+
+    @classmethod
+    def poll(cls, context):
+        return export_queue.running
+
+    def execute(self, context):
+        export_queue.paused = not export_queue.paused
+        return {'FINISHED'}
+
+
+class ET_OT_cancel_export_queue(Operator):
+    """Cancel all queued exports"""
+    bl_idname = "export_toolset.cancel_export_queue"
+    bl_label = "Cancel Export Queue"
+
+    @classmethod
+    def poll(cls, context):
+        return export_queue.running
+
+    def execute(self, context):
+        export_queue.jobs.clear()
+        export_queue.cancelled = True
+        return {'FINISHED'}
+
+
+class ET_OT_add_export_target(Operator):
+    """Add an export target with its own format, preset and folder"""
+    bl_idname = "export_toolset.add_export_target"
+    bl_label = "Add Export Target"
+
+    @classmethod
+    def poll(cls, context):
+        return get_active_export_properties(context) is not None
+
+    def execute(self, context):
+        export_properties = get_active_export_properties(context)
+        target = export_properties.targets.add()
+
+        # Start from the main export settings
+        target.format = export_properties.format
+        target.fbx_preset = export_properties.fbx_preset
+        target.obj_preset = export_properties.obj_preset
+
+        export_properties.target_index = len(export_properties.targets) - 1
+
+        return {'FINISHED'}
+
+
+class ET_OT_remove_export_target(Operator):
+    """Remove the active export target"""
+    bl_idname = "export_toolset.remove_export_target"
+    bl_label = "Remove Export Target"
+
+    @classmethod
+    def poll(cls, context):
+        export_properties = get_active_export_properties(context)
+
+        return (export_properties is not None and
+                0 <= export_properties.target_index <
+                len(export_properties.targets))
+
+    def execute(self, context):
+        export_properties = get_active_export_properties(context)
+        export_properties.targets.remove(export_properties.target_index)
+        export_properties.target_index = min(
+            export_properties.target_index,
+            len(export_properties.targets) - 1)
 
         return {'FINISHED'}
 
@@ -265,6 +970,55 @@ class ET_OT_sync_dir_path(Operator):
         return {'FINISHED'}
 
 
+class ET_OT_reload_presets(Operator):
+    """Rescan export preset folders"""
+    bl_idname = "export_toolset.reload_presets"
+    bl_label = "Reload Presets"
+
+    def execute(self, context):
+        reload_presets()
+        errors = find_preset_errors()
+
+        if errors:
+            for error in errors:
+                print("Export Toolset: " + error)
+
+            self.report({'WARNING'}, "%d preset errors, see console" %
+                        len(errors))
+        else:
+            self.report({'INFO'}, "Presets Reloaded")
+
+        return {'FINISHED'}
+
+
+class ET_OT_save_profile(Operator, ExportHelper):
+    """Save recorded export timings as a Chrome trace JSON file"""
+    bl_idname = "export_toolset.save_profile"
+    bl_label = "Save Profile"
+
+    filename_ext = ".json"
+    filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return len(profiler.events) > 0
+
+    def execute(self, context):
+        profiler.write_trace(self.filepath)
+        self.report({'INFO'}, "Profile Saved")
+        return {'FINISHED'}
+
+
+class ET_OT_clear_profile(Operator):
+    """Clear recorded export timings"""
+    bl_idname = "export_toolset.clear_profile"
+    bl_label = "Clear Profile"
+
+    def execute(self, context):
+        profiler.clear()
+        return {'FINISHED'}
+
+
 class ET_OT_export_linked_data(Operator):
     """ Export transformation data for each linked object into JSON file """
     bl_idname = "export_toolset.export_linked_data"
@@ -276,33 +1030,51 @@ class ET_OT_export_linked_data(Operator):
                 context.active_object.export_properties.directory and
                 len(context.selected_objects) > 0)
 
+    _timer = None
+
     def execute(self, context):
         bpy.ops.object.select_all(action='DESELECT')
         bpy.ops.object.select_linked(type='OBDATA')
 
+        scene = context.scene
+        data_format = scene.ET_linked_data_format
+        extension = linked_data_formats[data_format][0]
+
         active_object = context.active_object
         name = active_object.name.rsplit('.', 1)[0]
         file_path = path.join(active_object.export_properties.directory,
-                              name + ".json")
+                              name + extension)
 
-        # Clear file
-        open(file_path, 'w').close()
+        objects = context.view_layer.objects.selected
+        self.writer = write_linked_data(file_path, objects, data_format,
+                                        compact=scene.ET_compact_json)
 
-        with open(file_path, 'a') as file:
-            data = {"Linked Transform Data": []}
+        # Background mode has no window to run a modal timer in
+        if context.window is None:
+            return self.finish()
 
-            for obj in context.selected_objects:
-                loc = obj.location
-                rot = obj.rotation_euler
-                size = obj.dimensions
+        # Report once the file is written, without blocking the interface
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
 
-                obj_data = {obj.name: {
-                    "location": {"x": loc.x, "y": loc.y, "z": loc.z},
-                    "rotation": {"x": rot.x, "y": rot.y, "z": rot.z},
-                    "size": {"x": size.x, "y": size.y, "z": size.z}}}
+        return {'RUNNING_MODAL'}
 
-                data["Linked Transform Data"].append(obj_data)
+    def modal(self, context, event):
+        if event.type != 'TIMER' or self.writer.is_alive():
+            return {'PASS_THROUGH'}
 
-            file.write(json.dumps(data, indent=4) + '\n')
+        context.window_manager.event_timer_remove(self._timer)
+        return self.finish()
+
+    def finish(self):
+        error = finish_writer(self.writer)
+        file_name = path.basename(self.writer.file_path)
+
+        if error is not None:
+            self.report({'ERROR'}, "Failed to write %s: %s" %
+                        (file_name, error))
+        else:
+            self.report({'INFO'}, "Wrote " + file_name)
 
         return {'FINISHED'}
@@ -0,0 +1,194 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+
+from os import path
+
+import bpy
+from bpy.app.handlers import persistent
+from bpy.props import BoolProperty
+from bpy.types import Object, UIList, ViewLayer
+
+# Selection flags, filtered list flags and summary counts, valid until the
+# next depsgraph update that isn't a plain transform change
+list_cache = {}
+
+
+@persistent
+def invalidate_list_cache(scene=None, depsgraph=None):
+    # Moving objects updates the depsgraph every frame of the drag, but
+    # doesn't change which objects are listed
+    if depsgraph is not None and all(
+            isinstance(update.id, Object) and update.is_updated_transform and
+            not update.is_updated_geometry
+            for update in depsgraph.updates):
+        return
+
+    list_cache.clear()
+
+
+def get_selection_key(view_layer):
+    # Selected count and active object catch selection changes cheaply
+    objects = view_layer.objects
+    active = objects.active
+
+    return (view_layer.as_pointer(), len(objects), len(objects.selected),
+            active.as_pointer() if active else 0)
+
+
+def get_selection_flags(view_layer):
+    key = ("selection",) + get_selection_key(view_layer)
+    flags = list_cache.get(key)
+
+    if flags is None:
+        flags = [ob.select_get() for ob in view_layer.objects]
+        list_cache[key] = flags
+
+    return flags
+
+
+def get_export_summary(key, objects):
+    """Return (object count, objects without export folder)"""
+    summary = list_cache.get(("summary",) + key)
+
+    if summary is None:
+        count = 0
+        missing = 0
+
+        for ob in objects:
+            count += 1
+
+            if not ob.export_properties.directory:
+                missing += 1
+
+        summary = (count, missing)
+        list_cache[("summary",) + key] = summary
+
+    return summary
+
+
+def draw_export_summary(layout, summary):
+    count, missing = summary
+    row = layout.row()
+    row.label(text="%d objects" % count)
+
+    if missing:
+        row.alert = True
+        row.label(text="%d without folder" % missing, icon='ERROR')
+
+
+class ET_UL_objects(UIList):
+    missing_only: BoolProperty(
+        name="Missing Folder Only",
+        description="Show only objects without an export folder",
+        default=False)
+
+    def draw_item(self, context, layout, data, item, icon, active_data,
+                  active_propname, index):
+        obj = item
+        row = layout.row(align=True)
+
+        if not obj.export_properties.directory:
+            row.alert = True
+
+        row.prop(obj, "name", text="", emboss=False,
+                 icon='OUTLINER_OB_' + obj.type)
+
+        if obj == context.active_object:
+            row.label(icon='LAYER_ACTIVE')
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+
+        row = layout.row(align=True)
+        row.prop(self, "missing_only", toggle=True)
+        row.prop(self, "use_filter_sort_alpha", text="", icon='SORTALPHA')
+        row.prop(self, "use_filter_sort_reverse", text="",
+                 icon='SORT_DESC' if self.use_filter_sort_reverse
+                 else 'SORT_ASC')
+
+    def filter_items(self, context, data, propname):
+        objects = getattr(data, propname)
+        key = ("filter", data.as_pointer(), propname, len(objects),
+               self.filter_name, self.use_filter_invert, self.missing_only,
+               self.use_filter_sort_alpha)
+
+        # Whole view layer lists follow the selection
+        if isinstance(data, ViewLayer):
+            key += get_selection_key(data)
+        cached = list_cache.get(key)
+
+        if cached is None:
+            cached = self.filter_objects(data, objects)
+            list_cache[key] = cached
+
+        return cached
+
+    def filter_objects(self, data, objects):
+        helper = bpy.types.UI_UL_list
+        visible = self.bitflag_filter_item
+        invert = self.use_filter_invert
+
+        # Whole view layer is listed, keep only selected objects
+        if isinstance(data, ViewLayer):
+            flags = [visible if selected else 0
+                     for selected in get_selection_flags(data)]
+        else:
+            flags = [visible] * len(objects)
+
+        if self.missing_only:
+            flags = [flag if flag and not ob.export_properties.directory
+                     else 0 for flag, ob in zip(flags, objects)]
+
+        # Invert the name filter inside the listed objects only
+        if self.filter_name:
+            matches = helper.filter_items_by_name(
+                self.filter_name, visible, objects, "name", reverse=invert)
+            flags = [flag & match for flag, match in zip(flags, matches)]
+
+        # Blender inverts the returned flags again, undo it beforehand
+        if invert:
+            flags = [flag ^ visible for flag in flags]
+
+        order = []
+
+        if self.use_filter_sort_alpha:
+            order = helper.sort_items_by_name(objects, "name")
+
+        return flags, order
+
+
+class ET_UL_export_targets(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data,
+                  active_propname, index):
+        target = item
+        row = layout.row(align=True)
+        row.prop(target, "enabled", text="")
+
+        if not target.directory:
+            row.alert = True
+
+        preset = (target.fbx_preset if target.format == "FBX"
+                  else target.obj_preset)
+        row.label(text="%s: %s" % (target.format, preset))
+        row.label(text=path.basename(path.normpath(target.directory))
+                  if target.directory else "No Folder")